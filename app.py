@@ -2,28 +2,18 @@
 # 1/12/2025
 # Stock Evaluator AI Agent - This is a stock evaluator that uses AI to evaluate a stock
 
-import yfinance as yf
 import boto3
 import json
 from textblob import TextBlob
 import requests
 from datetime import datetime
-import sys
 from pathlib import Path
-
-class StockAnalysisLogger:
-    """Custom logger to write output to both file and console"""
-    def __init__(self, original_stdout, file):
-        self.terminal = original_stdout
-        self.file = file
-
-    def write(self, message):
-        self.file.write(message)
-        self.terminal.write(message)
-
-    def flush(self):
-        self.file.flush()
-        self.terminal.flush()
+from models.stock_data import FinancialData, SentimentData, StockAnalysis
+from services.market_data_service import MarketDataService
+from utils.helpers import to_float
+from utils.report_format import format_header, format_results
+from utils.report_sinks import BackgroundReportWriter, create_report_sinks
+from config import REPORT_FORMATS
 
 class StockAnalyzer:
     """Main class for analyzing stocks"""
@@ -31,6 +21,8 @@ class StockAnalyzer:
         self.output_dir = Path("analysis_outputs")
         self.output_dir.mkdir(exist_ok=True)
         self.bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-west-2')
+        self.market_data = MarketDataService()
+        self.report_writer = BackgroundReportWriter(create_report_sinks(REPORT_FORMATS, self.output_dir))
 
     def get_output_filename(self, ticker):
         """Generate output filename based on date and ticker"""
@@ -39,38 +31,64 @@ class StockAnalyzer:
 
     def analyze_single_stock(self, ticker):
         """Analyze a single stock and save results"""
-        output_file = self.get_output_filename(ticker)
-        
-        with open(output_file, 'w') as f:
-            original_stdout = sys.stdout
-            sys.stdout = StockAnalysisLogger(original_stdout, f)
-            
-            try:
-                self._perform_analysis(ticker)
-            finally:
-                sys.stdout = original_stdout
-                print(f"\nAnalysis saved to: {output_file}")
+        analysis = self._perform_analysis(ticker)
+        if analysis:
+            self.report_writer.submit(analysis)
+            self.report_writer.flush()
+            print(f"\nAnalysis saved to: {self.get_output_filename(ticker)}")
 
     def _perform_analysis(self, ticker):
         """Perform the actual stock analysis"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        print(f"\nAnalysis for {ticker} - {today}\n")
-        print("=" * 50)
+        print(format_header(ticker))
 
-        # Fetch and display financial data
+        # Fetch financial data, news sentiment and the AI recommendation
         print("\nFetching financial data and news sentiment...")
-        stock_data = self._fetch_stock_data(ticker)
+        snapshot = self.market_data.get_snapshot(ticker)
+        stock_data = self._fetch_stock_data(ticker, snapshot)
         if not stock_data:
-            return
+            return None
+
+        sentiment_data = self._fetch_news_sentiment(ticker, snapshot)
+        recommendation = self._get_ai_recommendation(ticker, stock_data, sentiment_data)
+
+        analysis = self._build_analysis(ticker, stock_data, sentiment_data, recommendation)
+        self._display_analysis_results(analysis)
+        return analysis
+
+    def _build_analysis(self, ticker, stock_data, sentiment_data, recommendation):
+        """Convert the raw results into a StockAnalysis for display and reporting"""
+        financial_data = FinancialData(**{
+            key: value if key == "industry" else to_float(value)
+            for key, value in stock_data.items()
+        })
 
-        sentiment_data = self._fetch_news_sentiment(ticker)
-        self._display_analysis_results(ticker, stock_data, sentiment_data)
+        sentiment = None
+        if sentiment_data:
+            sentiment = SentimentData(
+                sentiment_score=to_float(sentiment_data['sentiment_score']),
+                recent_headlines=sentiment_data['recent_headlines'],
+                sentiment_summary=sentiment_data['sentiment_summary']
+            )
+
+        recommendation_text = None
+        if recommendation:
+            try:
+                recommendation_text = recommendation['content'][0]['text']
+            except (KeyError, IndexError):
+                recommendation_text = "Error parsing recommendation"
+
+        return StockAnalysis(
+            ticker=ticker,
+            financial_data=financial_data,
+            sentiment_data=sentiment,
+            recommendation=recommendation_text,
+            analysis_date=datetime.now()
+        )
 
-    def _fetch_stock_data(self, ticker):
+    def _fetch_stock_data(self, ticker, snapshot):
         """Fetch financial data for a stock"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = snapshot.info
 
             return {
                 "current_price": info.get("currentPrice", "N/A"),
@@ -90,11 +108,10 @@ class StockAnalyzer:
             print(f"Error fetching data for {ticker}: {e}")
             return None
 
-    def _fetch_news_sentiment(self, ticker):
+    def _fetch_news_sentiment(self, ticker, snapshot):
         """Fetch and analyze news sentiment"""
         try:
-            stock = yf.Ticker(ticker)
-            news = stock.news
+            news = snapshot.news
             #print("\nDEBUG - Raw news data:")
             #print(news)  # See the raw news structure
             
@@ -258,28 +275,9 @@ class StockAnalyzer:
             print(f"Error during AI analysis: {e}")
             return None
 
-    def _display_analysis_results(self, ticker, stock_data, sentiment_data):
+    def _display_analysis_results(self, analysis):
         """Display the analysis results"""
-        print("\nFinancial Data:")
-        for key, value in stock_data.items():
-            print(f"{key}: {value}")
-
-        if sentiment_data:
-            print("\nNews Sentiment Analysis:")
-            print(f"Overall Sentiment: {sentiment_data['sentiment_summary']}")
-            print(f"Sentiment Score: {sentiment_data['sentiment_score']}")
-            print("\nRecent Headlines:")
-            for headline in sentiment_data['recent_headlines']:
-                print(f"- {headline}")
-
-        recommendation = self._get_ai_recommendation(ticker, stock_data, sentiment_data)
-        if recommendation:
-            print("\nAI Recommendation:")
-            try:
-                print(recommendation['content'][0]['text'])
-            except (KeyError, IndexError) as e:
-                print("Error parsing recommendation")
-        print("\n" + "=" * 50 + "\n")
+        print(format_results(analysis))
 
 def main():
     analyzer = StockAnalyzer()
@@ -288,6 +286,7 @@ def main():
         if ticker == 'QUIT':
             break
         analyzer.analyze_single_stock(ticker)
+    analyzer.report_writer.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
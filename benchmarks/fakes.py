@@ -0,0 +1,188 @@
+import io
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from botocore.exceptions import ClientError
+
+@dataclass
+class BackendProfile:
+    """How a fake backend behaves: base latency, jitter and failure rates.
+
+    Each call sleeps `latency` plus an exponentially distributed extra delay
+    with mean `jitter`, which gives the long tail real services have. A call
+    fails with probability `error_rate` and is throttled with probability
+    `throttle_rate`.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    seed: Optional[int] = 0
+
+class _Backend:
+    def __init__(self, profile: BackendProfile):
+        self.profile = profile
+        self._random = random.Random(profile.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.throttles = 0
+
+    def round_trip(self) -> Optional[str]:
+        """Simulate one round trip; returns "error", "throttle" or None"""
+        with self._lock:
+            self.calls += 1
+            delay = self.profile.latency
+            if self.profile.jitter > 0:
+                delay += self._random.expovariate(1 / self.profile.jitter)
+            roll = self._random.random()
+            if roll < self.profile.error_rate:
+                outcome = "error"
+                self.errors += 1
+            elif roll < self.profile.error_rate + self.profile.throttle_rate:
+                outcome = "throttle"
+                self.throttles += 1
+            else:
+                outcome = None
+        if delay > 0:
+            time.sleep(delay)
+        return outcome
+
+def _seed_for(ticker: str) -> int:
+    return zlib.crc32(ticker.encode())
+
+class FakeTicker:
+    """Stands in for yfinance.Ticker with deterministic, plausible data per symbol"""
+    _WORDS = ["beats", "misses", "expands", "cuts", "raises", "guidance", "record", "quarter",
+              "lawsuit", "upgrade", "downgrade", "growth", "slump", "rally", "partnership"]
+
+    def __init__(self, ticker: str, backend: _Backend):
+        self.ticker = ticker
+        self._backend = backend
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        self._fetch("info")
+        rng = random.Random(_seed_for(self.ticker))
+        price = rng.uniform(5, 500)
+        return {
+            "currentPrice": round(price, 2),
+            "marketCap": rng.uniform(1e8, 2e12),
+            "industry": rng.choice(["Semiconductors", "Banks", "Biotechnology", "Utilities", "Software"]),
+            "trailingPE": rng.uniform(-10, 80),
+            "dividendYield": rng.uniform(0, 0.06),
+            "trailingPegRatio": rng.uniform(0.2, 4),
+            "priceToSalesTrailing12Months": rng.uniform(0.5, 20),
+            "priceToBook": rng.uniform(0.5, 15),
+            "enterpriseValue": rng.uniform(1e8, 2e12),
+            "ebitda": rng.uniform(-1e8, 1e11),
+            "returnOnEquity": rng.uniform(-0.2, 0.5),
+            "returnOnAssets": rng.uniform(-0.1, 0.2),
+        }
+
+    @property
+    def news(self) -> List[Dict[str, Any]]:
+        self._fetch("news")
+        rng = random.Random(_seed_for(self.ticker) + 1)
+        articles = []
+        for i in range(8):
+            words = " ".join(rng.choice(self._WORDS) for _ in range(6))
+            articles.append({
+                "id": f"{self.ticker}-{i}",
+                "content": {
+                    "title": f"{self.ticker} {words}",
+                    "summary": f"Analysts say {self.ticker} {rng.choice(self._WORDS)} after {words}.",
+                },
+            })
+        return articles
+
+    def _fetch(self, what: str) -> None:
+        outcome = self._backend.round_trip()
+        if outcome == "throttle":
+            raise RuntimeError(f"Too Many Requests. Rate limited fetching {what} for {self.ticker}")
+        if outcome == "error":
+            raise RuntimeError(f"Failed to fetch {what} for {self.ticker}")
+
+class FakeMarketData(_Backend):
+    """Replaces yfinance: `ticker_factory` for MarketDataService and `download` for PriceHistoryService"""
+    def ticker_factory(self, ticker: str) -> FakeTicker:
+        return FakeTicker(ticker, self)
+
+    def download(self, tickers: List[str], period: str = "2y", **kwargs) -> pd.DataFrame:
+        outcome = self.round_trip()
+        if outcome is not None:
+            raise RuntimeError("Failed to download price history")
+
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=504)
+        columns = {}
+        for ticker in tickers:
+            rng = np.random.default_rng(_seed_for(ticker))
+            returns = rng.normal(0.0003, 0.02, len(index))
+            columns[ticker] = rng.uniform(5, 500) * np.exp(np.cumsum(returns))
+        return pd.concat({"Close": pd.DataFrame(columns, index=index)}, axis=1)
+
+class FakeBedrockRuntime(_Backend):
+    """Replaces the boto3 bedrock-runtime client handed to BedrockClient"""
+    _BATCH_TICKER = re.compile(r"^### (\S+)$", re.MULTILINE)
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self._raise_for(self.round_trip(), "InvokeModel")
+        response = self._response(json.loads(body))
+        return {'body': io.BytesIO(json.dumps(response).encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self._raise_for(self.round_trip(), "InvokeModelWithResponseStream")
+        return {'body': self._events(self._response(json.loads(body)))}
+
+    def _response(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = request["messages"][0]["content"]
+        tickers = self._BATCH_TICKER.findall(prompt)
+        if tickers:
+            text = json.dumps([self._entry(ticker) for ticker in tickers])
+        else:
+            entry = self._entry(prompt.split()[1])
+            text = (f"Risk Level: {entry['risk_level']}\n"
+                    f"Target Price Range: ${entry['target_low']:.2f} - ${entry['target_high']:.2f}\n"
+                    f"Recommendation: {entry['recommendation']}")
+        return {
+            'content': [{'type': 'text', 'text': text}],
+            'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4},
+        }
+
+    @staticmethod
+    def _entry(ticker: str) -> Dict[str, Any]:
+        rng = random.Random(_seed_for(ticker) + 2)
+        low = rng.uniform(5, 500)
+        return {
+            "ticker": ticker,
+            "risk_level": rng.choice(["Low", "Medium", "High"]),
+            "target_low": round(low, 2),
+            "target_high": round(low * rng.uniform(1.05, 1.4), 2),
+            "recommendation": f"Fundamentals look mixed for {ticker}. "
+                              f"{rng.choice(['Buy', 'Hold', 'Sell'])}",
+        }
+
+    @staticmethod
+    def _events(response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        usage = response['usage']
+        payloads = [{'type': 'message_start', 'message': {'usage': {'input_tokens': usage['input_tokens']}}}]
+        text = response['content'][0]['text']
+        payloads += [{'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': text[i:i + 16]}}
+                     for i in range(0, len(text), 16)]
+        payloads.append({'type': 'message_delta', 'usage': {'output_tokens': usage['output_tokens']}})
+        for payload in payloads:
+            yield {'chunk': {'bytes': json.dumps(payload).encode('utf-8')}}
+
+    @staticmethod
+    def _raise_for(outcome: Optional[str], operation: str) -> None:
+        if outcome is None:
+            return
+        code = "ThrottlingException" if outcome == "throttle" else "InternalServerException"
+        raise ClientError({'Error': {'Code': code, 'Message': f"Simulated {code}"}}, operation)
@@ -0,0 +1,167 @@
+"""Offline throughput benchmarks for the full StockAnalyzer pipeline.
+
+Market data and Bedrock are replaced by local fakes with configurable
+latency, jitter and failure rates, so results are reproducible and need
+no network access. Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --scenario 50 --market-latency-ms 40 --bedrock-latency-ms 800
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.fakes import BackendProfile, FakeBedrockRuntime, FakeMarketData
+from main import StockAnalyzer
+from services.bedrock_client import BedrockClient
+from services.market_data_service import MarketDataService
+from services.price_history_service import PriceHistoryService
+from services.sentiment_engine import SentimentEngine
+from utils.metrics import metrics
+
+SCENARIOS = {"1": 1, "50": 50, "1000": 1000}
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    tickers: int
+    succeeded: int
+    failed: int
+    wall_seconds: float
+    tickers_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    peak_memory_mb: float
+    market_data_calls: int
+    bedrock_calls: int
+    bedrock_throttles: int
+
+def benchmark_tickers(count: int) -> List[str]:
+    """Deterministic synthetic symbols: AAAA, AAAB, ..."""
+    tickers = []
+    for n in range(count):
+        letters = ""
+        for _ in range(4):
+            n, digit = divmod(n, 26)
+            letters = chr(ord("A") + digit) + letters
+        tickers.append(letters)
+    return tickers
+
+def run_scenario(name: str, count: int, market_profile: BackendProfile, bedrock_profile: BackendProfile,
+                 workers: int, ai_batch_size: int, requests_per_minute: float) -> BenchmarkResult:
+    market = FakeMarketData(market_profile)
+    bedrock = FakeBedrockRuntime(bedrock_profile)
+    # Backoff is scaled down with the fake latencies so throttling costs the same relative time
+    client = BedrockClient(client=bedrock, requests_per_minute=requests_per_minute,
+                           tokens_per_minute=requests_per_minute * 10000,
+                           backoff_base=max(bedrock_profile.latency, 0.001),
+                           backoff_max=max(bedrock_profile.latency * 30, 0.03))
+    analyzer = StockAnalyzer(max_workers=workers, use_cache=False, ai_batch_size=ai_batch_size,
+                             report_formats=(),
+                             market_data=MarketDataService(ticker_factory=market.ticker_factory),
+                             price_history=PriceHistoryService(download=market.download),
+                             bedrock_client=client)
+
+    tickers = benchmark_tickers(count)
+    metrics.reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        latencies = []
+        succeeded = 0
+        for ticker, analysis in analyzer.analyze_many(tickers):
+            latencies.append(time.perf_counter() - start)
+            succeeded += analysis is not None and analysis.recommendation is not None
+        wall = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        analyzer.close()
+
+    # With every ticker submitted at once, latency is time-to-result from the start of the run;
+    # per-ticker pipeline time comes from the analysis_total span when it was recorded
+    stage = metrics.stage_summary().get("analysis_total")
+    if stage:
+        p50, p95, p99, worst = stage["p50"], stage["p95"], stage["p99"], stage["max"]
+    else:
+        latencies.sort()
+        p50, p95, p99 = (latencies[min(len(latencies) - 1, int(q * len(latencies)))] for q in (0.50, 0.95, 0.99))
+        worst = latencies[-1]
+
+    return BenchmarkResult(
+        scenario=name,
+        tickers=count,
+        succeeded=succeeded,
+        failed=count - succeeded,
+        wall_seconds=round(wall, 3),
+        tickers_per_second=round(count / wall, 2),
+        p50_ms=round(p50 * 1000, 1),
+        p95_ms=round(p95 * 1000, 1),
+        p99_ms=round(p99 * 1000, 1),
+        max_ms=round(worst * 1000, 1),
+        peak_memory_mb=round(peak / 2 ** 20, 2),
+        market_data_calls=market.calls,
+        bedrock_calls=bedrock.calls,
+        bedrock_throttles=bedrock.throttles,
+    )
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    header = (f"{'scenario':<10}{'ok':>6}{'failed':>8}{'wall s':>9}{'tickers/s':>11}"
+              f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}{'throttles':>11}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r.scenario:<10}{r.succeeded:>6}{r.failed:>8}{r.wall_seconds:>9.2f}"
+                     f"{r.tickers_per_second:>11.2f}{r.p50_ms:>10.1f}{r.p95_ms:>10.1f}"
+                     f"{r.p99_ms:>10.1f}{r.peak_memory_mb:>10.2f}{r.bedrock_throttles:>11}")
+    return "\n".join(lines)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline StockAnalyzer benchmarks")
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(SCENARIOS, key=int),
+                        help="ticker count to run, repeatable (default: all)")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--ai-batch-size", type=int, default=1)
+    parser.add_argument("--market-latency-ms", type=float, default=20.0)
+    parser.add_argument("--market-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--market-error-rate", type=float, default=0.0)
+    parser.add_argument("--bedrock-latency-ms", type=float, default=200.0)
+    parser.add_argument("--bedrock-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--bedrock-error-rate", type=float, default=0.0)
+    parser.add_argument("--bedrock-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=float, default=1e6,
+                        help="Bedrock client rate limit (default: effectively unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, metavar="PATH",
+                        help="also write the results as JSON, for comparing runs")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    market_profile = BackendProfile(latency=args.market_latency_ms / 1000, jitter=args.market_jitter_ms / 1000,
+                                    error_rate=args.market_error_rate, seed=args.seed)
+    bedrock_profile = BackendProfile(latency=args.bedrock_latency_ms / 1000, jitter=args.bedrock_jitter_ms / 1000,
+                                     error_rate=args.bedrock_error_rate,
+                                     throttle_rate=args.bedrock_throttle_rate, seed=args.seed)
+
+    # Services import their heavy dependencies on first use; load them now so
+    # scenarios time the pipeline rather than one-off imports
+    SentimentEngine().score(["warm up"])
+
+    results = []
+    for name in args.scenarios or sorted(SCENARIOS, key=int):
+        print(f"Running {name}-ticker scenario...", file=sys.stderr)
+        results.append(run_scenario(name, SCENARIOS[name], market_profile, bedrock_profile,
+                                    args.workers, args.ai_batch_size, args.requests_per_minute))
+
+    print(format_results(results))
+    if args.json:
+        args.json.write_text(json.dumps([asdict(result) for result in results], indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Cold-start check: time a fresh interpreter importing main and building a default StockAnalyzer.
+
+Exits non-zero when the median exceeds STARTUP_BUDGET_SECONDS, so it can
+gate CI. Run from the repository root:
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+from config import STARTUP_BUDGET_SECONDS
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Measured inside the child so interpreter boot is included but subprocess overhead is not
+STARTUP_SNIPPET = """
+import time
+started = time.perf_counter()
+import main
+analyzer = main.StockAnalyzer()  # default report formats, so the history database open is timed too
+analyzer.close()
+elapsed = time.perf_counter() - started
+heavy = sorted(name for name in ("boto3", "yfinance", "pandas", "textblob", "nltk") if name in __import__("sys").modules)
+print(elapsed, ",".join(heavy))
+"""
+
+def measure_startup(runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.split()
+        if len(output) > 1:
+            print(f"Warning: heavy modules loaded at startup: {output[1]}", file=sys.stderr)
+        timings.append(float(output[0]))
+    return timings
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure StockAnalyzer cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS,
+                        help="seconds allowed for the median run (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    timings = measure_startup(args.runs)
+    median = statistics.median(timings)
+    print(f"startup over {args.runs} runs: median {median * 1000:.0f} ms, "
+          f"max {max(timings) * 1000:.0f} ms, budget {args.budget * 1000:.0f} ms")
+    if median > args.budget:
+        sys.exit(f"Startup median {median:.3f}s exceeds the {args.budget:.3f}s budget")
+
+if __name__ == "__main__":
+    main()
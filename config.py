@@ -4,15 +4,157 @@ from pathlib import Path
 # Paths
 BASE_DIR = Path(__file__).parent
 OUTPUT_DIR = BASE_DIR / "analysis_outputs"
+CACHE_DIR = BASE_DIR / "cache"
+CACHE_DB_PATH = CACHE_DIR / "cache.db"
 
 # AWS Configuration
 AWS_REGION = "us-west-2"
 BEDROCK_MODEL = "anthropic.claude-3-5-haiku-20241022-v1:0"
+BEDROCK_INFERENCE_PARAMS = {
+    "max_tokens": 300,
+    "temperature": 0.7,
+    "top_p": 0.999,
+}
+BEDROCK_MAX_POOL_CONNECTIONS = 20
+BEDROCK_REQUESTS_PER_MINUTE = 50
+BEDROCK_TOKENS_PER_MINUTE = 100000
+BEDROCK_MAX_RETRIES = 6
+BEDROCK_BACKOFF_BASE_SECONDS = 1.0
+BEDROCK_BACKOFF_MAX_SECONDS = 30.0
+
+# Batched recommendations: several tickers share one Bedrock request
+BATCH_TOKENS_PER_TICKER = 150
+BATCH_MAX_OUTPUT_TOKENS = 4096
 
 # Analysis Settings
 MAX_NEWS_ITEMS = 5
+MAX_HEADLINES = 5
 SENTIMENT_THRESHOLD_POSITIVE = 0.2
 SENTIMENT_THRESHOLD_NEGATIVE = -0.2
+SENTIMENT_CACHE_SIZE = 50000
+SENTIMENT_PROCESS_POOL_THRESHOLD = 500
+SENTIMENT_MAX_PROCESSES = None  # None uses every CPU
+
+# News Archive Settings
+ENABLE_NEWS_ARCHIVE = True
+NEWS_EWMA_HALF_LIFE_HOURS = 72  # decay of the rolling sentiment and article-velocity averages
+NEWS_SNAPSHOT_DAYS = 8  # daily EWMA snapshots kept per ticker for the 1d/7d change
+
+# Market Data Settings
+MARKET_DATA_TTL_SECONDS = 300
+MARKET_DATA_CACHE_SIZE = 2000
+
+# Yahoo Finance HTTP Settings
+YAHOO_POOL_SIZE = 48  # keep-alive connections shared by every yfinance call; covers MAX_WORKERS x stages
+YAHOO_INITIAL_RATE = 5.0  # requests per second, adapted between the min and max below
+YAHOO_MIN_RATE = 0.5
+YAHOO_MAX_RATE = 25.0
+YAHOO_RATE_INCREASE = 0.5  # requests/second added per second of successful requests
+YAHOO_RATE_DECREASE_FACTOR = 0.5  # multiplier applied on a 429 or 5xx
+YAHOO_BURST = 10
+YAHOO_MAX_RETRIES = 3
+YAHOO_BACKOFF_BASE_SECONDS = 0.5
+YAHOO_BACKOFF_MAX_SECONDS = 10.0
+YAHOO_CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures before requests stop
+YAHOO_CIRCUIT_RESET_SECONDS = 30.0  # wait before a probe request is let through
+
+# Fundamentals Cache Settings
+# yfinance `info` keys grouped by how often they actually change
+FUNDAMENTALS_FIELD_GROUPS = {
+    "quote": ["currentPrice", "marketCap"],
+    "valuation": ["trailingPE", "trailingPegRatio", "priceToSalesTrailing12Months",
+                  "priceToBook", "enterpriseValue", "dividendYield"],
+    "financials": ["ebitda", "returnOnEquity", "returnOnAssets"],
+    "profile": ["industry"],
+}
+FUNDAMENTALS_TTL_SECONDS = {
+    "quote": 15 * 60,
+    "valuation": 24 * 60 * 60,
+    "financials": 24 * 60 * 60,
+    "profile": 7 * 24 * 60 * 60,
+}
+FUNDAMENTALS_CACHE_MAX_TICKERS = 5000
+FUNDAMENTALS_STALE_WHILE_REVALIDATE = True
+
+# Peer Index Settings
+ENABLE_PEER_INDEX = True
+PEER_SKETCH_ACCURACY = 0.02  # relative width of the per-industry ratio histogram buckets
+PEER_MIN_COUNT = 5  # peers an industry needs before percentiles are reported
+
+# Recommendation Cache Settings
+RECOMMENDATION_CACHE_TTL_SECONDS = 24 * 60 * 60
+RECOMMENDATION_CACHE_MAX_ENTRIES = 10000
+
+# Price History Settings
+ENABLE_PRICE_HISTORY = True
+PRICE_HISTORY_PERIOD = "2y"  # long enough for the 200-day SMA and 52-week range
+PRICE_HISTORY_TTL_SECONDS = 60 * 60
+
+# Screener Settings
+SCREEN_FIELDS = ["price_to_earnings", "peg_ratio", "ev_to_ebitda", "roe", "roa", "dividend_yield"]
+SCREEN_FILTERS = ["price_to_earnings>=0", "price_to_earnings<=40", "roe>=0.05"]
+# Positive weights favour high values, negative weights favour low values
+SCREEN_RANKING = {
+    "roe": 1.0,
+    "roa": 0.5,
+    "ev_to_ebitda": -1.0,
+    "peg_ratio": -0.5,
+    "dividend_yield": 0.25,
+}
+SCREEN_TOP_K = 25
+
+# Report Settings
+REPORT_FORMATS = ["text", "jsonl", "history"]  # any of: text, jsonl, csv, parquet, history
+HISTORY_DB_NAME = "history.db"  # queryable archive of every analysis, kept in the output directory
+REPORT_BATCH_SIZE = 50
+REPORT_FLUSH_SECONDS = 0.5
+
+# Metrics Settings
+METRICS_MAX_SPANS = 100000  # individual spans kept for inspection; aggregates cover every span
+METRICS_QUANTILE_SAMPLES = 10000  # latest durations per stage that p50/p95/p99 are taken from
+PROFILE_OUTPUT = BASE_DIR / "profile.pstats"
+
+# Startup Settings
+STARTUP_BUDGET_SECONDS = 0.5  # import main and build a StockAnalyzer, checked by benchmarks/startup.py
+
+# Backtest Settings
+BACKTEST_HORIZONS = {"1w": 5, "1m": 21, "3m": 63}  # forward windows in trading days
+BACKTEST_LOOKBACK_DAYS = 2 * 365
+BACKTEST_PRICE_PERIOD = "5y"  # must reach back to the oldest analysis being tested
+
+# Watchlist Settings
+WATCHLIST_INTERVAL_SECONDS = 15 * 60
+# Relative tolerance per FinancialData field; crossing a bucket of this width counts as a change
+WATCHLIST_FINGERPRINT_TOLERANCES = {
+    "current_price": 0.02,
+    "price_to_earnings": 0.05,
+    "dividend_yield": 0.10,
+    "peg_ratio": 0.10,
+    "ev_to_ebitda": 0.05,
+    "roe": 0.05,
+    "roa": 0.05,
+}
+WATCHLIST_MAX_AGE_SECONDS = 24 * 60 * 60  # re-analyze at least this often even when unchanged
+
+# Server Settings
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_MAX_BATCH_TICKERS = 1000
+
+# Stage Settings
+STAGE_TIMEOUTS = {  # seconds from when a stage starts running; None leaves it to the service's own retries
+    "fundamentals": 30,
+    "news": 20,
+    "sentiment": 30,
+    "price_history": 30,
+    "prompt": 10,
+    "recommendation": None,
+}
+STAGE_THREADS_PER_TICKER = 3  # fundamentals, news and price history run side by side
 
-# Create necessary directories
-OUTPUT_DIR.mkdir(exist_ok=True) 
\ No newline at end of file
+# Batch Settings
+MAX_WORKERS = 16
+STOCK_SERVICE_CONCURRENCY = 8
+SENTIMENT_SERVICE_CONCURRENCY = 8
+AI_SERVICE_CONCURRENCY = 4
+AI_BATCH_SIZE = 1  # tickers per Bedrock request; 1 disables batching
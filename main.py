@@ -1,87 +1,562 @@
+import argparse
 import sys
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from services.fundamentals_cache import FundamentalsCache
+from services.market_data_service import MarketDataService
+from services.price_history_service import PriceHistoryService
+from services.screener import ScreenFilter, Screener, parse_filter, parse_ranking
+from services.recommendation_cache import RecommendationCache
 from services.stock_service import StockService
+from services.news_archive import NewsArchive
+from services.peer_index import PeerIndex
+from services.sentiment_engine import SentimentEngine
 from services.sentiment_service import SentimentService
 from services.ai_service import AIService
-from utils.logger import StockAnalysisLogger
-from models.stock_data import StockAnalysis
-from config import OUTPUT_DIR
+from services.bedrock_client import BedrockClient
+from utils.helpers import format_value, lazy_property, read_tickers_file
+from utils.metrics import metrics
+from utils.report_format import SEPARATOR, format_header, format_inputs, format_results
+from utils.report_sinks import REPORT_SINKS, BackgroundReportWriter, TextReportSink, create_report_sinks
+from utils.stage_dag import Stage, StageDAG
+from models.stock_data import FinancialData, SentimentData, StockAnalysis
+from config import (
+    OUTPUT_DIR,
+    MAX_WORKERS,
+    STOCK_SERVICE_CONCURRENCY,
+    SENTIMENT_SERVICE_CONCURRENCY,
+    AI_SERVICE_CONCURRENCY,
+    AI_BATCH_SIZE,
+    ENABLE_PRICE_HISTORY,
+    ENABLE_NEWS_ARCHIVE,
+    ENABLE_PEER_INDEX,
+    SCREEN_FILTERS,
+    SCREEN_RANKING,
+    SCREEN_TOP_K,
+    REPORT_FORMATS,
+    PROFILE_OUTPUT,
+    SERVER_HOST,
+    SERVER_PORT,
+    WATCHLIST_INTERVAL_SECONDS,
+    BACKTEST_LOOKBACK_DAYS,
+    STAGE_TIMEOUTS,
+    STAGE_THREADS_PER_TICKER,
+)
 
 class StockAnalyzer:
-    def __init__(self):
-        self.stock_service = StockService()
-        self.sentiment_service = SentimentService()
-        self.ai_service = AIService()
+    def __init__(self, max_workers: int = MAX_WORKERS, use_cache: bool = True,
+                 stream: bool = False, ai_batch_size: int = AI_BATCH_SIZE,
+                 report_formats: Sequence[str] = REPORT_FORMATS,
+                 market_data: Optional[MarketDataService] = None,
+                 price_history: Optional[PriceHistoryService] = None,
+                 bedrock_client: Optional[BedrockClient] = None):
+        self.use_cache = use_cache
+        self.max_workers = max_workers
+        self.stream = stream
+        self.ai_batch_size = ai_batch_size
+        self._bedrock_client = bedrock_client
+        # Injected services take the place of the lazily built defaults below
+        if market_data is not None:
+            self.market_data = market_data
+        if price_history is not None:
+            self.price_history = price_history
+        self.report_writer = BackgroundReportWriter(create_report_sinks(report_formats))
+
+        # Each stage talks to a different backend, so each gets its own cap
+        self._stock_limit = threading.BoundedSemaphore(STOCK_SERVICE_CONCURRENCY)
+        self._sentiment_limit = threading.BoundedSemaphore(SENTIMENT_SERVICE_CONCURRENCY)
+        self._ai_limit = threading.BoundedSemaphore(AI_SERVICE_CONCURRENCY)
+
+    # Services are built on first use, so startup (and --help) never opens
+    # the cache database or loads yfinance, boto3 or textblob
+
+    @lazy_property
+    def market_data(self) -> MarketDataService:
+        return MarketDataService()
+
+    @lazy_property
+    def fundamentals_cache(self) -> Optional[FundamentalsCache]:
+        return FundamentalsCache() if self.use_cache else None
+
+    @lazy_property
+    def stock_service(self) -> StockService:
+        peer_index = PeerIndex() if self.use_cache and ENABLE_PEER_INDEX else None
+        return StockService(self.market_data, self.fundamentals_cache, peer_index)
+
+    @lazy_property
+    def sentiment_service(self) -> SentimentService:
+        engine = SentimentEngine()
+        archive = NewsArchive(engine) if self.use_cache and ENABLE_NEWS_ARCHIVE else None
+        return SentimentService(self.market_data, engine, archive=archive)
+
+    @lazy_property
+    def price_history(self) -> Optional[PriceHistoryService]:
+        return PriceHistoryService() if ENABLE_PRICE_HISTORY else None
+
+    @lazy_property
+    def recommendation_cache(self) -> Optional[RecommendationCache]:
+        return RecommendationCache() if self.use_cache else None
+
+    @lazy_property
+    def ai_service(self) -> AIService:
+        return AIService(self.recommendation_cache, self._bedrock_client)
+
+    @lazy_property
+    def stage_executor(self) -> ThreadPoolExecutor:
+        # Kept apart from the per-ticker pools, so stages never queue behind the tickers waiting on them
+        return ThreadPoolExecutor(max_workers=self.max_workers * STAGE_THREADS_PER_TICKER,
+                                  thread_name_prefix="stage")
 
     def analyze_single_stock(self, ticker: str) -> None:
-        output_file = self._get_output_filename(ticker)
-        
-        with open(output_file, 'w') as f:
-            original_stdout = sys.stdout
-            sys.stdout = StockAnalysisLogger(original_stdout, f)
-            
-            try:
-                self._perform_analysis(ticker)
-            finally:
-                sys.stdout = original_stdout
-                print(f"\nAnalysis saved to: {output_file}")
-
-    def _get_output_filename(self, ticker: str) -> Path:
-        today = datetime.now().strftime("%Y-%m-%d")
-        return OUTPUT_DIR / f"{today}_{ticker}_analysis.txt"
-
-    def _perform_analysis(self, ticker: str) -> None:
-        today = datetime.now().strftime("%Y-%m-%d")
-        print(f"\nAnalysis for {ticker} - {today}\n")
-        print("=" * 50)
+        analysis = self._perform_analysis(ticker)
+        if analysis:
+            self.report_writer.submit(analysis)
+            self.report_writer.flush()
+            text_files = [sink.path_for(ticker, analysis.analysis_date)
+                          for sink in self.report_writer.sinks if isinstance(sink, TextReportSink)]
+            print(f"\nAnalysis saved to: {text_files[0] if text_files else OUTPUT_DIR}")
+
+    def analyze(self, ticker: str) -> Optional[StockAnalysis]:
+        """Analyze one ticker without printing anything, queueing its reports"""
+        return self._analyze_and_save(ticker.upper())
+
+    def close(self) -> None:
+        """Write out any queued reports and stop the worker pools"""
+        self.report_writer.close()
+        if "stage_executor" in self.__dict__:
+            self.stage_executor.shutdown(wait=False, cancel_futures=True)
+        if "sentiment_service" in self.__dict__:
+            self.sentiment_service.engine.close()
+
+    def analyze_many(self, tickers: Iterable[str]) -> Iterator[Tuple[str, Optional[StockAnalysis]]]:
+        """Analyze tickers concurrently, yielding (ticker, analysis) as each one finishes.
+
+        A ticker that fails yields None as its analysis; the others keep going.
+        """
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        if self.price_history:
+            # One bulk download for the whole list instead of one per ticker
+            self.price_history.prefetch(tickers)
+
+        if self.ai_batch_size > 1:
+            yield from self._analyze_many_batched(tickers)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(self._analyze_and_save, ticker): ticker for ticker in tickers}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    yield ticker, future.result()
+                except Exception as e:
+                    print(f"Error analyzing {ticker}: {e}")
+                    yield ticker, None
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _analyze_many_batched(self, tickers: List[str]) -> Iterator[Tuple[str, Optional[StockAnalysis]]]:
+        # Inputs are fetched per ticker, then packed ai_batch_size at a time into one sentiment
+        # batch and one Bedrock request
+        fetch_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        ai_executor = ThreadPoolExecutor(max_workers=AI_SERVICE_CONCURRENCY)
+        try:
+            fetches = {fetch_executor.submit(self._fetch_inputs, ticker, False): ticker for ticker in tickers}
+            batches = {}
+            chunk = []
+
+            for future in as_completed(fetches):
+                ticker = fetches[future]
+                try:
+                    financial_data, sentiment_data = future.result()
+                except Exception as e:
+                    print(f"Error analyzing {ticker}: {e}")
+                    financial_data = None
+                if not financial_data:
+                    yield ticker, None
+                    continue
+
+                chunk.append((ticker, financial_data, sentiment_data))
+                if len(chunk) >= self.ai_batch_size:
+                    batches[ai_executor.submit(self._recommend_and_save_batch, chunk)] = chunk
+                    chunk = []
+
+                for batch in [batch for batch in batches if batch.done()]:
+                    yield from self._batch_results(batch, batches.pop(batch))
+
+            if chunk:
+                batches[ai_executor.submit(self._recommend_and_save_batch, chunk)] = chunk
+            for batch in as_completed(list(batches)):
+                yield from self._batch_results(batch, batches.pop(batch))
+        finally:
+            fetch_executor.shutdown(wait=True, cancel_futures=True)
+            ai_executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _batch_results(batch, chunk) -> Iterator[Tuple[str, Optional[StockAnalysis]]]:
+        try:
+            yield from batch.result()
+        except Exception as e:
+            print(f"Error analyzing {', '.join(ticker for ticker, _, _ in chunk)}: {e}")
+            for ticker, _, _ in chunk:
+                yield ticker, None
+
+    def screen(self, tickers: Iterable[str], filters: Sequence[ScreenFilter],
+               ranking: Dict[str, float], top_k: int) -> List[str]:
+        """Narrow a universe down to the top_k tickers worth sending through the full analysis"""
+        screener = Screener(self.stock_service, max_workers=self.max_workers, stock_limit=self._stock_limit)
+        return screener.screen(screener.load_universe(tickers), filters, ranking, top_k)
+
+    def _perform_analysis(self, ticker: str) -> Optional[StockAnalysis]:
+        print(format_header(ticker))
 
         print("\nFetching financial data and news sentiment...")
-        financial_data = self.stock_service.fetch_stock_data(ticker)
+        if not self.stream:
+            analysis = self._run_analysis(ticker)
+            if analysis:
+                print(format_results(analysis))
+            return analysis
+
+        # Show the market data right away, then the recommendation as it is generated
+        financial_data, sentiment_data = self._fetch_inputs(ticker)
         if not financial_data:
-            return
+            return None
+        print(format_inputs(financial_data, sentiment_data))
+        print("\nAI Recommendation:")
+        recommendation = self._recommend(ticker, financial_data, sentiment_data,
+                                         on_text=self._write_stream)
+        print()
+        print("\n" + SEPARATOR + "\n")
 
-        sentiment_data = self.sentiment_service.fetch_news_sentiment(ticker)
-        recommendation = self.ai_service.get_recommendation(
-            ticker, financial_data, sentiment_data
+        return StockAnalysis(
+            ticker=ticker,
+            financial_data=financial_data,
+            sentiment_data=sentiment_data,
+            recommendation=recommendation,
+            analysis_date=datetime.now()
         )
 
-        analysis = StockAnalysis(
+    def _analyze_and_save(self, ticker: str) -> Optional[StockAnalysis]:
+        analysis = self._run_analysis(ticker)
+        if analysis:
+            self.report_writer.submit(analysis)
+        return analysis
+
+    def _recommend_and_save_batch(self, chunk: List[Tuple[str, FinancialData, Optional[SentimentData]]]
+                                  ) -> List[Tuple[str, StockAnalysis]]:
+        snapshots = {ticker: self.market_data.get_snapshot(ticker) for ticker, _, _ in chunk}
+        with self._sentiment_limit:
+            sentiment = self.sentiment_service.fetch_news_sentiment_batch(snapshots)
+        chunk = [(ticker, financial_data, sentiment[ticker]) for ticker, financial_data, _ in chunk]
+
+        with self._ai_limit:
+            recommendations = self.ai_service.get_recommendations_batch(chunk)
+
+        results = []
+        for ticker, financial_data, sentiment_data in chunk:
+            analysis = StockAnalysis(
+                ticker=ticker,
+                financial_data=financial_data,
+                sentiment_data=sentiment_data,
+                recommendation=recommendations.get(ticker),
+                analysis_date=datetime.now()
+            )
+            self.report_writer.submit(analysis)
+            results.append((ticker, analysis))
+        return results
+
+    def _run_analysis(self, ticker: str) -> Optional[StockAnalysis]:
+        with metrics.span("analysis_total", ticker):
+            result = self._analysis_dag(ticker).run(self.stage_executor, label=ticker)
+            if not result.ok:
+                return None
+            financial_data, sentiment_data = self._merge_inputs(result.values)
+
+        return StockAnalysis(
             ticker=ticker,
             financial_data=financial_data,
             sentiment_data=sentiment_data,
-            recommendation=recommendation,
+            recommendation=result.get("recommendation"),
             analysis_date=datetime.now()
         )
 
-        self._display_analysis_results(analysis)
-
-    def _display_analysis_results(self, analysis: StockAnalysis) -> None:
-        print("\nFinancial Data:")
-        for key, value in vars(analysis.financial_data).items():
-            print(f"{key}: {value}")
-
-        if analysis.sentiment_data:
-            print("\nNews Sentiment Analysis:")
-            print(f"Overall Sentiment: {analysis.sentiment_data.sentiment_summary}")
-            print(f"Sentiment Score: {analysis.sentiment_data.sentiment_score}")
-            print("\nRecent Headlines:")
-            for headline in analysis.sentiment_data.recent_headlines:
-                print(f"- {headline}")
-
-        if analysis.recommendation:
-            print("\nAI Recommendation:")
-            print(analysis.recommendation)
-        
-        print("\n" + "=" * 50 + "\n")
-
-def main():
-    analyzer = StockAnalyzer()
-    while True:
-        ticker = input("Enter a stock ticker (or 'quit' to exit): ").upper()
-        if ticker == 'QUIT':
-            break
-        analyzer.analyze_single_stock(ticker)
+    def _fetch_inputs(self, ticker: str, with_sentiment: bool = True
+                      ) -> Tuple[Optional[FinancialData], Optional[SentimentData]]:
+        """Fundamentals plus sentiment; without sentiment the news is still fetched, ready to score in a batch"""
+        dag = self._analysis_dag(ticker)
+        inputs = ("fundamentals", "sentiment" if with_sentiment else "news", "price_history")
+        targets = [name for name in inputs if name in dag.stages]
+        result = dag.run(self.stage_executor, targets=targets, label=ticker)
+        if not result.ok:
+            return None, None
+        return self._merge_inputs(result.values)
+
+    def _analysis_dag(self, ticker: str) -> StageDAG:
+        """The per-ticker pipeline; fundamentals, news and price history have no inputs, so run side by side.
+
+        Only fundamentals are essential. A news, sentiment or price-history
+        stage that fails or times out leaves its part of the prompt out, and
+        a failed recommendation leaves the analysis without one.
+        """
+        # One snapshot feeds every stage, so the symbol is only fetched once
+        snapshot = self.market_data.get_snapshot(ticker)
+
+        def fundamentals(_: Dict) -> Optional[FinancialData]:
+            return self.stock_service.fetch_stock_data(ticker, snapshot)
+
+        def sentiment(inputs: Dict) -> Optional[SentimentData]:
+            if not inputs["news"]:
+                return None
+            return self.sentiment_service.fetch_news_sentiment(ticker, snapshot)
+
+        def prompt(inputs: Dict) -> str:
+            financial_data, sentiment_data = self._merge_inputs(inputs)
+            return self.ai_service.build_prompt(ticker, financial_data, sentiment_data)
+
+        def recommendation(inputs: Dict) -> Optional[str]:
+            if inputs["prompt"] is None:
+                return None
+            return self.ai_service.recommend(ticker, inputs["prompt"])
+
+        # Limits are stage fields rather than taken inside the stage, so waiting on them isn't timed
+        prompt_inputs = ("fundamentals", "sentiment")
+        stages = [
+            Stage("fundamentals", fundamentals, timeout=STAGE_TIMEOUTS["fundamentals"], critical=True,
+                  limit=self._stock_limit),
+            Stage("news", lambda _: snapshot.news, timeout=STAGE_TIMEOUTS["news"], fallback=[]),
+            Stage("sentiment", sentiment, requires=("news",), timeout=STAGE_TIMEOUTS["sentiment"],
+                  limit=self._sentiment_limit),
+        ]
+        if self.price_history:
+            stages.append(Stage("price_history", lambda _: self.price_history.get_indicators(ticker),
+                                timeout=STAGE_TIMEOUTS["price_history"], fallback={}))
+            prompt_inputs += ("price_history",)
+        stages += [
+            Stage("prompt", prompt, requires=prompt_inputs, timeout=STAGE_TIMEOUTS["prompt"]),
+            Stage("recommendation", recommendation, requires=("prompt",),
+                  timeout=STAGE_TIMEOUTS["recommendation"], limit=self._ai_limit),
+        ]
+        return StageDAG(stages)
+
+    @staticmethod
+    def _merge_inputs(values: Dict) -> Tuple[FinancialData, Optional[SentimentData]]:
+        """Financial data with any price-history indicators applied, plus sentiment"""
+        financial_data = values["fundamentals"]
+        if "price_history" in values:
+            PriceHistoryService.apply_indicators(values["price_history"], financial_data)
+        return financial_data, values.get("sentiment")
+
+    def _recommend(self, ticker: str, financial_data: FinancialData,
+                   sentiment_data: Optional[SentimentData],
+                   on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        with self._ai_limit:
+            return self.ai_service.get_recommendation(
+                ticker, financial_data, sentiment_data, on_text=on_text
+            )
+
+    @staticmethod
+    def _write_stream(text: str) -> None:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+def run_batch(analyzer: StockAnalyzer, tickers: List[str]) -> None:
+    completed = 0
+    failed = []
+    for ticker, analysis in analyzer.analyze_many(tickers):
+        completed += 1
+        if analysis:
+            print(f"[{completed}/{len(tickers)}] {ticker}: done")
+        else:
+            failed.append(ticker)
+            print(f"[{completed}/{len(tickers)}] {ticker}: failed")
+
+    analyzer.report_writer.flush()
+    print(f"\nAnalyzed {len(tickers) - len(failed)} of {len(tickers)} tickers, reports saved to: {OUTPUT_DIR}")
+    if failed:
+        print(f"Failed: {', '.join(sorted(failed))}")
+    if analyzer.recommendation_cache:
+        stats = analyzer.recommendation_cache.stats()
+        print(f"Recommendation cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate)")
+    print("\nStage latencies:")
+    print(metrics.summary_table())
+
+def print_history(ticker: str, days: int) -> None:
+    from services.history_store import AnalysisHistory
+
+    analyses = AnalysisHistory().history(ticker, start=datetime.now() - timedelta(days=days))
+    if not analyses:
+        print(f"No analyses of {ticker.upper()} in the last {days} days")
+    for analysis in analyses:
+        sentiment = analysis.sentiment_data.sentiment_summary if analysis.sentiment_data else "N/A"
+        recommendation = " ".join((analysis.recommendation or "N/A").split())
+        print(f"{analysis.analysis_date:%Y-%m-%d %H:%M}  ${format_value(analysis.financial_data.current_price)}  "
+              f"sentiment {sentiment}  {recommendation}")
+
+def run_backtest(days: int, workers: int) -> None:
+    from services.backtest import Backtester
+    from services.history_store import AnalysisHistory
+
+    now = datetime.now()
+    analyses = AnalysisHistory().between(now - timedelta(days=days), now)
+    backtester = Backtester(workers=workers)
+    print(backtester.report(backtester.run(analyses)))
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AI-assisted stock evaluator")
+    parser.add_argument("--tickers-file", type=Path,
+                        help="analyze every ticker in this file concurrently instead of prompting")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"number of tickers analyzed at once in batch mode (default: {MAX_WORKERS})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="skip the on-disk caches and always fetch fresh data")
+    parser.add_argument("--ai-batch-size", type=int, default=AI_BATCH_SIZE,
+                        help="tickers per Bedrock request in batch mode (default: %(default)s)")
+    parser.add_argument("--screen", action="store_true",
+                        help="screen the tickers file on fundamentals and analyze only the top candidates")
+    parser.add_argument("--filter", action="append", dest="filters", metavar="EXPR",
+                        help="screen filter such as 'price_to_earnings<=30' (repeatable; default from config)")
+    parser.add_argument("--rank", metavar="WEIGHTS",
+                        help="screen ranking such as 'roe:1,ev_to_ebitda:-1' (default from config)")
+    parser.add_argument("--top-k", type=int, default=SCREEN_TOP_K,
+                        help="number of screened tickers to analyze (default: %(default)s)")
+    parser.add_argument("--report-format", action="append", dest="report_formats",
+                        choices=sorted(REPORT_SINKS), metavar="FORMAT",
+                        help=f"report output format, repeatable: {', '.join(sorted(REPORT_SINKS))} "
+                             f"(default: {', '.join(REPORT_FORMATS)})")
+    parser.add_argument("--stream", action="store_true",
+                        help="print the AI recommendation as it is generated (interactive mode)")
+    parser.add_argument("--history", metavar="TICKER",
+                        help="print past recommendations for TICKER from the history database and exit")
+    parser.add_argument("--backtest", action="store_true",
+                        help="score past recommendations from the history database against later prices")
+    parser.add_argument("--backtest-workers", type=int, default=1,
+                        help="processes to shard the backtest over by ticker (default: %(default)s)")
+    parser.add_argument("--days", type=int,
+                        help=f"how far back --history (default: 90) or --backtest "
+                             f"(default: {BACKTEST_LOOKBACK_DAYS}) looks")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep re-checking the tickers file, re-analyzing only tickers whose inputs changed")
+    parser.add_argument("--interval", type=float, default=WATCHLIST_INTERVAL_SECONDS,
+                        help="seconds between watchlist checks (default: %(default)s)")
+    parser.add_argument("--serve", action="store_true",
+                        help="run as a long-lived HTTP server that keeps clients and caches warm")
+    parser.add_argument("--host", default=SERVER_HOST, help="server address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="server port (default: %(default)s)")
+    parser.add_argument("--socket", type=Path, metavar="PATH",
+                        help="serve on this Unix socket instead of host:port")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", type=Path, metavar="PATH",
+                          help="record every Yahoo Finance and Bedrock response into a cassette file "
+                               "(caches are bypassed so every request is captured)")
+    cassette.add_argument("--replay", type=Path, metavar="PATH",
+                          help="serve every Yahoo Finance and Bedrock request from a recorded cassette, "
+                               "with no network access")
+    parser.add_argument("--metrics-out", type=Path, metavar="PATH",
+                        help="write stage latencies and token counts on exit; "
+                             ".prom or .txt for Prometheus text format, JSON otherwise")
+    parser.add_argument("--profile", nargs="?", type=Path, const=PROFILE_OUTPUT, metavar="PATH",
+                        help=f"run under cProfile and dump the stats (default path: {PROFILE_OUTPUT.name})")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if not args.profile:
+        run(args)
+        return
+
+    import cProfile
+    import pstats
+
+    # Stages run on worker threads, which a profiler started here doesn't see before Python 3.12:
+    # each new thread gets its own profiler on its first event, and all are merged at the end
+    profilers = [cProfile.Profile()]
+    per_thread = sys.version_info < (3, 12)
+
+    def profile_thread(*_) -> None:
+        profiler = cProfile.Profile()
+        profilers.append(profiler)
+        profiler.enable()
+
+    if per_thread:
+        threading.setprofile(profile_thread)
+    try:
+        profilers[0].runcall(run, args)
+    finally:
+        if per_thread:
+            threading.setprofile(None)
+        stats = pstats.Stats(*profilers)
+        stats.dump_stats(args.profile)
+        print(f"\nProfile saved to: {args.profile} ({len(profilers)} threads)")
+        stats.sort_stats("cumulative").print_stats(20)
+
+def run(args: argparse.Namespace) -> None:
+    cassette = None
+    services = {}
+    if args.record or args.replay:
+        from services.recording import Recorder, Replayer
+
+        cassette = Recorder(args.record) if args.record else Replayer(args.replay)
+        services = cassette.analyzer_services()
+
+    # Cached fundamentals, recommendations and news stats would hide requests from a recording
+    # and make replayed prompts depend on local state, so caches are off around cassettes
+    analyzer = StockAnalyzer(max_workers=args.workers, use_cache=not args.no_cache and cassette is None,
+                             stream=args.stream, ai_batch_size=args.ai_batch_size,
+                             report_formats=args.report_formats or REPORT_FORMATS, **services)
+
+    try:
+        if args.history:
+            print_history(args.history, args.days or 90)
+            return
+
+        if args.backtest:
+            run_backtest(args.days or BACKTEST_LOOKBACK_DAYS, args.backtest_workers)
+            return
+
+        if args.serve:
+            from server import serve
+
+            serve(analyzer, args.host, args.port, args.socket)
+            return
+
+        if args.watch:
+            if not args.tickers_file:
+                sys.exit("Error: --watch requires --tickers-file")
+            from watchlist import WatchlistScheduler
+
+            WatchlistScheduler(analyzer).run_forever(read_tickers_file(args.tickers_file), args.interval)
+            return
+
+        if args.tickers_file:
+            tickers = read_tickers_file(args.tickers_file)
+            if args.screen:
+                try:
+                    filters = [parse_filter(expression) for expression in args.filters or SCREEN_FILTERS]
+                    ranking = parse_ranking(args.rank) if args.rank else SCREEN_RANKING
+                except ValueError as e:
+                    sys.exit(f"Error: {e}")
+                universe_size = len(tickers)
+                tickers = analyzer.screen(tickers, filters, ranking, args.top_k)
+                print(f"Screened {universe_size} tickers down to {len(tickers)}: {', '.join(tickers)}")
+            run_batch(analyzer, tickers)
+            return
+
+        while True:
+            ticker = input("Enter a stock ticker (or 'quit' to exit): ").upper()
+            if ticker == 'QUIT':
+                break
+            analyzer.analyze_single_stock(ticker)
+    finally:
+        analyzer.close()
+        if cassette:
+            cassette.close()
+        if args.metrics_out:
+            metrics.export(args.metrics_out)
+            print(f"Metrics saved to: {args.metrics_out}")
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,12 @@
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
 
-@dataclass
+@dataclass(slots=True)
 class FinancialData:
+    """Fundamentals for one ticker; numeric fields are floats and NaN when unknown"""
     current_price: float
     market_cap: float
     industry: str
@@ -16,6 +19,96 @@ class FinancialData:
     ev_to_ebitda: float
     roe: float
     roa: float
+    # Technical indicators from price history; NaN until PriceHistoryService fills them in
+    sma_50: float = math.nan
+    sma_200: float = math.nan
+    ema_20: float = math.nan
+    rsi_14: float = math.nan
+    volatility_30d: float = math.nan
+    max_drawdown: float = math.nan
+    week52_position: float = math.nan
+    # Percentile (0-1) of each ratio among the industry's peers; NaN until PeerIndex fills them in
+    price_to_earnings_industry_pct: float = math.nan
+    price_to_book_industry_pct: float = math.nan
+    price_to_sales_industry_pct: float = math.nan
+    ev_to_ebitda_industry_pct: float = math.nan
+    roe_industry_pct: float = math.nan
+    roa_industry_pct: float = math.nan
+    industry_peer_count: float = math.nan
+
+# Ratio -> the FinancialData field holding its industry percentile
+PEER_PERCENTILE_FIELDS = {
+    "price_to_earnings": "price_to_earnings_industry_pct",
+    "price_to_book": "price_to_book_industry_pct",
+    "price_to_sales": "price_to_sales_industry_pct",
+    "ev_to_ebitda": "ev_to_ebitda_industry_pct",
+    "roe": "roe_industry_pct",
+    "roa": "roa_industry_pct",
+}
+
+FINANCIAL_DATA_FIELDS = tuple(field.name for field in fields(FinancialData))
+NUMERIC_FIELDS = tuple(name for name in FINANCIAL_DATA_FIELDS if name != "industry")
+_NUMERIC_INDEX = {name: row for row, name in enumerate(NUMERIC_FIELDS)}
+
+class FinancialDataBatch:
+    """FinancialData for many tickers stored as a struct of float64 arrays.
+
+    `values` has one row per numeric field and one column per ticker, so
+    `column(field)` returns a contiguous view without copying.
+    """
+    __slots__ = ("tickers", "industries", "values", "_positions")
+
+    def __init__(self, tickers: Sequence[str], industries: Sequence[str], values: np.ndarray):
+        if values.shape != (len(NUMERIC_FIELDS), len(tickers)):
+            raise ValueError(f"Expected values of shape {(len(NUMERIC_FIELDS), len(tickers))}, got {values.shape}")
+        self.tickers = np.asarray(tickers, dtype=object)
+        self.industries = np.asarray(industries, dtype=object)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self._positions = {ticker: position for position, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def from_records(cls, tickers: Sequence[str],
+                     records: Sequence[Optional[FinancialData]]) -> "FinancialDataBatch":
+        """Build a batch from records; a None record becomes an all-NaN row"""
+        values = np.full((len(NUMERIC_FIELDS), len(tickers)), np.nan)
+        industries = []
+        for position, record in enumerate(records):
+            if record is None:
+                industries.append("N/A")
+                continue
+            industries.append(record.industry)
+            values[:, position] = [getattr(record, name) for name in NUMERIC_FIELDS]
+        return cls(tickers, industries, values)
+
+    @classmethod
+    def from_pandas(cls, frame) -> "FinancialDataBatch":
+        """Build a batch from a DataFrame indexed by ticker, as produced by to_pandas"""
+        industries = frame["industry"] if "industry" in frame else ["N/A"] * len(frame)
+        values = frame.reindex(columns=list(NUMERIC_FIELDS)).to_numpy(dtype=np.float64).T
+        return cls(list(frame.index), list(industries), values)
+
+    def to_pandas(self):
+        """Return a ticker-indexed DataFrame; the numeric block is a view where pandas allows"""
+        import pandas as pd
+
+        frame = pd.DataFrame(self.values.T, index=pd.Index(self.tickers, name="ticker"),
+                             columns=list(NUMERIC_FIELDS), copy=False)
+        frame.insert(0, "industry", self.industries)
+        return frame
+
+    def column(self, field: str) -> np.ndarray:
+        return self.values[_NUMERIC_INDEX[field]]
+
+    def record(self, ticker: str) -> FinancialData:
+        position = self._positions[ticker]
+        numeric = dict(zip(NUMERIC_FIELDS, self.values[:, position].tolist()))
+        return FinancialData(industry=self.industries[position], **numeric)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._positions
 
 @dataclass
 class NewsItem:
@@ -28,6 +121,15 @@ class SentimentData:
     sentiment_score: float
     recent_headlines: List[str]
     sentiment_summary: str
+    # Identifiers of every article that was scored, used to spot new headlines
+    headline_ids: List[str] = field(default_factory=list)
+    # Rolling statistics from the news archive; NaN when it is disabled or empty
+    sentiment_ewma: float = math.nan
+    article_velocity: float = math.nan  # articles per day, exponentially weighted
+    sentiment_change_1d: float = math.nan
+    sentiment_change_7d: float = math.nan
+
+ROLLING_SENTIMENT_FIELDS = ("sentiment_ewma", "article_velocity", "sentiment_change_1d", "sentiment_change_7d")
 
 @dataclass
 class StockAnalysis:
@@ -35,4 +137,48 @@ class StockAnalysis:
     financial_data: FinancialData
     sentiment_data: Optional[SentimentData]
     recommendation: Optional[str]
-    analysis_date: datetime 
\ No newline at end of file
+    analysis_date: datetime
+
+    def to_record(self) -> Dict[str, Any]:
+        """Flatten into one JSON-safe row: financial fields inline, NaN as None"""
+        record: Dict[str, Any] = {
+            "ticker": self.ticker,
+            "analysis_date": self.analysis_date.isoformat(),
+        }
+        for name in FINANCIAL_DATA_FIELDS:
+            value = getattr(self.financial_data, name)
+            record[name] = None if isinstance(value, float) and math.isnan(value) else value
+
+        sentiment = self.sentiment_data
+        record["sentiment_score"] = sentiment.sentiment_score if sentiment else None
+        record["sentiment_summary"] = sentiment.sentiment_summary if sentiment else None
+        record["recent_headlines"] = list(sentiment.recent_headlines) if sentiment else []
+        record["headline_ids"] = list(sentiment.headline_ids) if sentiment else []
+        for name in ROLLING_SENTIMENT_FIELDS:
+            value = getattr(sentiment, name) if sentiment else math.nan
+            record[name] = None if math.isnan(value) else value
+        record["recommendation"] = self.recommendation
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "StockAnalysis":
+        """Inverse of to_record"""
+        financial = {name: (math.nan if record.get(name) is None else record[name])
+                     for name in NUMERIC_FIELDS}
+        sentiment = None
+        if record.get("sentiment_score") is not None:
+            sentiment = SentimentData(
+                sentiment_score=record["sentiment_score"],
+                recent_headlines=list(record.get("recent_headlines") or []),
+                sentiment_summary=record.get("sentiment_summary") or "",
+                headline_ids=list(record.get("headline_ids") or []),
+                **{name: (math.nan if record.get(name) is None else record[name])
+                   for name in ROLLING_SENTIMENT_FIELDS},
+            )
+        return cls(
+            ticker=record["ticker"],
+            financial_data=FinancialData(industry=record.get("industry") or "N/A", **financial),
+            sentiment_data=sentiment,
+            recommendation=record.get("recommendation"),
+            analysis_date=datetime.fromisoformat(record["analysis_date"]),
+        )
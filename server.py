@@ -0,0 +1,138 @@
+import json
+import os
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from models.stock_data import StockAnalysis
+from utils.metrics import metrics
+from utils.single_flight import SingleFlight
+from config import SERVER_MAX_BATCH_TICKERS
+
+if TYPE_CHECKING:
+    # Not imported at runtime: under `python main.py --serve` that would load main.py a second time
+    from main import StockAnalyzer
+
+class AnalysisService:
+    """Serves analyses from one long-lived StockAnalyzer.
+
+    Clients, connection pools and caches stay warm between requests, and
+    concurrent requests for the same ticker share a single pipeline run.
+    Every analysis, single or batched, runs on one pool of `max_workers`
+    threads, so a burst of requests queues here instead of piling into the
+    stage pool, where waiting would eat into stage timeouts.
+    """
+    def __init__(self, analyzer: "StockAnalyzer", max_batch_tickers: int = SERVER_MAX_BATCH_TICKERS):
+        self.analyzer = analyzer
+        self.max_batch_tickers = max_batch_tickers
+        self.single_flight = SingleFlight()
+        self.executor = ThreadPoolExecutor(max_workers=analyzer.max_workers, thread_name_prefix="analysis")
+
+    def analyze(self, ticker: str) -> Optional[StockAnalysis]:
+        return self.executor.submit(self._analyze, ticker.upper()).result()
+
+    def analyze_batch(self, tickers: List[str]) -> List[Tuple[str, Optional[StockAnalysis]]]:
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        if self.analyzer.price_history:
+            self.analyzer.price_history.prefetch(tickers)
+        return list(zip(tickers, self.executor.map(self._analyze, tickers)))
+
+    def _analyze(self, ticker: str) -> Optional[StockAnalysis]:
+        return self.single_flight.do(ticker, lambda: self.analyzer.analyze(ticker))
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "in_flight": self.single_flight.in_flight(),
+                "coalesced": self.single_flight.coalesced}
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """GET /analyze?ticker=T, POST /analyze/batch {"tickers": [...]}, GET /health, GET /metrics"""
+    server_version = "StockEvaluator/1.0"
+    service: AnalysisService
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send_json(200, self.service.health())
+        elif url.path == "/metrics":
+            self._send(200, metrics.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        elif url.path == "/analyze":
+            ticker = parse_qs(url.query).get("ticker", [""])[0].strip()
+            if not ticker:
+                self._send_json(400, {"error": "Missing 'ticker' query parameter"})
+                return
+            analysis = self.service.analyze(ticker)
+            if analysis is None:
+                self._send_json(502, {"error": f"Could not analyze {ticker.upper()}"})
+            else:
+                self._send_json(200, analysis.to_record())
+        else:
+            self._send_json(404, {"error": f"Unknown path {url.path}"})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/analyze/batch":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            tickers = json.loads(self.rfile.read(length) or b"{}").get("tickers")
+        except (ValueError, AttributeError):
+            tickers = None
+        if not isinstance(tickers, list) or not all(isinstance(ticker, str) for ticker in tickers):
+            self._send_json(400, {"error": 'Expected a JSON body like {"tickers": ["AAPL", "MSFT"]}'})
+            return
+        if len(tickers) > self.service.max_batch_tickers:
+            self._send_json(413, {"error": f"At most {self.service.max_batch_tickers} tickers per request"})
+            return
+
+        results = self.service.analyze_batch(tickers)
+        self._send_json(200, {
+            "results": [analysis.to_record() for _, analysis in results if analysis],
+            "failed": [ticker for ticker, analysis in results if analysis is None],
+        })
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(analyzer: "StockAnalyzer", host: str, port: int, socket_path: Optional[Path] = None) -> None:
+    """Serve analyses over HTTP on host:port, or on a Unix socket if `socket_path` is given"""
+    service = AnalysisService(analyzer)
+    handler = type("BoundAnalysisRequestHandler", (AnalysisRequestHandler,), {"service": service})
+
+    if socket_path:
+        if socket_path.exists():
+            os.unlink(socket_path)
+        httpd = ThreadingUnixHTTPServer(str(socket_path), handler)
+        print(f"Serving analyses on unix socket {socket_path}")
+    else:
+        httpd = ThreadingHTTPServer((host, port), handler)
+        print(f"Serving analyses on http://{host}:{httpd.server_address[1]}")
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
+        if socket_path and socket_path.exists():
+            os.unlink(socket_path)
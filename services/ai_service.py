@@ -1,59 +1,228 @@
-import boto3
 import json
-from typing import Optional, Dict
+import math
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from models.stock_data import FinancialData, SentimentData
+from services.bedrock_client import BedrockClient
+from services.recommendation_cache import RecommendationCache
+from utils.helpers import format_value
+from utils.metrics import Span, metrics
+from config import (
+    BEDROCK_MODEL,
+    BEDROCK_INFERENCE_PARAMS,
+    BATCH_TOKENS_PER_TICKER,
+    BATCH_MAX_OUTPUT_TOKENS,
+)
 
 class AIService:
-    def __init__(self):
-        self.bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-west-2')
+    def __init__(self, cache: Optional[RecommendationCache] = None,
+                 client: Optional[BedrockClient] = None):
+        self.bedrock = client or BedrockClient()
+        self.cache = cache
 
     def get_recommendation(self, ticker: str, financial_data: FinancialData, 
-                         sentiment_data: Optional[SentimentData]) -> Optional[str]:
+                         sentiment_data: Optional[SentimentData],
+                         on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """Get a recommendation, streaming it through `on_text` as it arrives if given"""
         try:
-            prompt = self._create_analysis_prompt(ticker, financial_data, sentiment_data)
-            response = self.bedrock_runtime.invoke_model(
-                modelId="anthropic.claude-3-5-haiku-20241022-v1:0",
-                contentType="application/json",
-                accept="application/json",
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 300,
-                    "temperature": 0.7,
-                    "top_p": 0.999,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            result = json.loads(response['body'].read().decode('utf-8'))
-            return result['content'][0]['text'] if result else None
+            prompt = self.build_prompt(ticker, financial_data, sentiment_data)
         except Exception as e:
             print(f"Error during AI analysis: {e}")
             return None
+        return self.recommend(ticker, prompt, on_text=on_text)
+
+    def build_prompt(self, ticker: str, financial_data: FinancialData,
+                     sentiment_data: Optional[SentimentData]) -> str:
+        with metrics.span("prompt_build", ticker):
+            return self._create_analysis_prompt(ticker, financial_data, sentiment_data)
+
+    def recommend(self, ticker: str, prompt: str,
+                  on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """Get a recommendation for an already built prompt, via the cache when possible"""
+        try:
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(BEDROCK_MODEL, BEDROCK_INFERENCE_PARAMS, prompt)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    if on_text:
+                        on_text(cached)
+                    return cached
+
+            with metrics.span("bedrock_invoke", ticker) as span:
+                if on_text:
+                    result = self.bedrock.invoke_stream(prompt, on_text, BEDROCK_INFERENCE_PARAMS)
+                else:
+                    result = self.bedrock.invoke(prompt, BEDROCK_INFERENCE_PARAMS)
+                self._record_usage(span, result)
+            recommendation = result['content'][0]['text'] if result else None
+
+            if self.cache and recommendation:
+                self.cache.put(cache_key, BEDROCK_MODEL, recommendation)
+            return recommendation
+        except Exception as e:
+            print(f"Error during AI analysis: {e}")
+            return None
+
+    async def aget_recommendation(self, ticker: str, financial_data: FinancialData,
+                                  sentiment_data: Optional[SentimentData]) -> Optional[str]:
+        import asyncio
+
+        return await asyncio.to_thread(self.get_recommendation, ticker, financial_data, sentiment_data)
+
+    def get_recommendations_batch(self, items: List[Tuple[str, FinancialData, Optional[SentimentData]]]
+                                  ) -> Dict[str, Optional[str]]:
+        """Get recommendations for several tickers from a single model request.
+
+        Tickers missing from, or malformed in, the model's JSON reply fall
+        back to individual get_recommendation calls.
+        """
+        if len(items) == 1:
+            ticker, financial_data, sentiment_data = items[0]
+            return {ticker: self.get_recommendation(ticker, financial_data, sentiment_data)}
+
+        parsed = {}
+        try:
+            with metrics.span("prompt_build") as span:
+                span.attributes["tickers"] = len(items)
+                prompt = self._create_batch_prompt(items)
+            params = {**BEDROCK_INFERENCE_PARAMS,
+                      "max_tokens": min(BATCH_MAX_OUTPUT_TOKENS, BATCH_TOKENS_PER_TICKER * len(items))}
+
+            cache_key = None
+            text = None
+            if self.cache:
+                cache_key = self.cache.make_key(BEDROCK_MODEL, params, prompt)
+                text = self.cache.get(cache_key)
+            if text is None:
+                with metrics.span("bedrock_invoke_batch") as span:
+                    span.attributes["tickers"] = len(items)
+                    result = self.bedrock.invoke(prompt, params)
+                    self._record_usage(span, result)
+                text = result['content'][0]['text'] if result else ""
+
+            parsed = self._parse_batch_response(text, {ticker for ticker, _, _ in items})
+            # Only keep replies that parsed for every ticker, so a cache hit never means a retry
+            if self.cache and len(parsed) == len(items):
+                self.cache.put(cache_key, BEDROCK_MODEL, text)
+        except Exception as e:
+            print(f"Error during batched AI analysis: {e}")
+
+        recommendations = {}
+        for ticker, financial_data, sentiment_data in items:
+            if ticker in parsed:
+                recommendations[ticker] = parsed[ticker]
+            else:
+                recommendations[ticker] = self.get_recommendation(ticker, financial_data, sentiment_data)
+        return recommendations
+
+    @staticmethod
+    def _record_usage(span: Span, result: Optional[Dict]) -> None:
+        usage = (result or {}).get('usage') or {}
+        span.attributes["input_tokens"] = usage.get('input_tokens', 0)
+        span.attributes["output_tokens"] = usage.get('output_tokens', 0)
 
     def _create_analysis_prompt(self, ticker: str, data: FinancialData, 
                               sentiment_data: Optional[SentimentData]) -> str:
-        prompt = f"""
-        Analyze {ticker} stock based on the following financial data and provide a recommendation:
-        Current Price: {data.current_price}
-        Market Cap: {data.market_cap}
-        Industry: {data.industry}
-        Price-to-Earnings Ratio: {data.price_to_earnings}
-        Dividend Yield: {data.dividend_yield}
-        PEG Ratio: {data.peg_ratio}
-        Price-to-Sales Ratio: {data.price_to_sales}
-        Price-to-Book Ratio: {data.price_to_book}
-        Earnings Yield: {data.earnings_yield}
-        EV-to-EBITDA Ratio: {data.ev_to_ebitda}
-        ROE: {data.roe}
-        ROA: {data.roa}
-        """
-        
+        lines = [f"Analyze {ticker} stock based on the following financial data and provide a recommendation:"]
+        lines += self._format_data_lines(data, sentiment_data)
+        lines.append("")
+        lines.append("Based on both financial metrics and recent news sentiment, is this a good investment at the current price? Keep it short and concise. Be sure to add a risk level, target price range, and recommendation.")
+        return "\n".join(lines)
+
+    def _create_batch_prompt(self, items: List[Tuple[str, FinancialData, Optional[SentimentData]]]) -> str:
+        lines = ["Analyze each of the following stocks based on its financial data and recent news sentiment, and decide whether it is a good investment at the current price."]
+        for ticker, data, sentiment_data in items:
+            lines.append("")
+            lines.append(f"### {ticker}")
+            lines += self._format_data_lines(data, sentiment_data)
+
+        lines.append("")
+        lines.append('Respond with only a JSON array holding one object per stock, in the order given, with exactly these keys: "ticker" (string), "risk_level" ("Low", "Medium" or "High"), "target_low" (number), "target_high" (number), "recommendation" (one or two sentences ending in Buy, Hold or Sell).')
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_data_lines(data: FinancialData, sentiment_data: Optional[SentimentData]) -> List[str]:
+        lines = [
+            f"Current Price: {format_value(data.current_price)}",
+            f"Market Cap: {format_value(data.market_cap)}",
+            f"Industry: {data.industry}",
+            f"Price-to-Earnings Ratio: {format_value(data.price_to_earnings)}",
+            f"Dividend Yield: {format_value(data.dividend_yield)}",
+            f"PEG Ratio: {format_value(data.peg_ratio)}",
+            f"Price-to-Sales Ratio: {format_value(data.price_to_sales)}",
+            f"Price-to-Book Ratio: {format_value(data.price_to_book)}",
+            f"Earnings Yield: {format_value(data.earnings_yield)}",
+            f"EV-to-EBITDA Ratio: {format_value(data.ev_to_ebitda)}",
+            f"ROE: {format_value(data.roe)}",
+            f"ROA: {format_value(data.roa)}",
+        ]
+
+        # Price-history indicators are only sent when they were computed
+        for label, value, fmt in (
+            ("50-Day SMA", data.sma_50, "{:.2f}"),
+            ("200-Day SMA", data.sma_200, "{:.2f}"),
+            ("20-Day EMA", data.ema_20, "{:.2f}"),
+            ("14-Day RSI", data.rsi_14, "{:.1f}"),
+            ("30-Day Volatility (annualized)", data.volatility_30d, "{:.1%}"),
+            ("Max Drawdown", data.max_drawdown, "{:.1%}"),
+            ("Position in 52-Week Range", data.week52_position, "{:.0%}"),
+        ):
+            if not math.isnan(value):
+                lines.append(f"{label}: {fmt.format(value)}")
+
+        # Where each ratio sits among the industry's peers, once there are enough of them
+        peer_lines = [f"{label} {value:.0%}" for label, value in (
+            ("P/E", data.price_to_earnings_industry_pct),
+            ("P/B", data.price_to_book_industry_pct),
+            ("P/S", data.price_to_sales_industry_pct),
+            ("EV/EBITDA", data.ev_to_ebitda_industry_pct),
+            ("ROE", data.roe_industry_pct),
+            ("ROA", data.roa_industry_pct),
+        ) if not math.isnan(value)]
+        if peer_lines:
+            lines.append(f"Industry Percentiles (among {data.industry_peer_count:.0f} {data.industry} peers, "
+                         f"0% lowest): {', '.join(peer_lines)}")
+
         if sentiment_data:
-            prompt += f"""
-            Recent News Sentiment: {sentiment_data.sentiment_summary} (Score: {sentiment_data.sentiment_score})
-            Recent Headlines:
-            """
+            lines.append(f"Recent News Sentiment: {sentiment_data.sentiment_summary} (Score: {sentiment_data.sentiment_score})")
+            # Rolling news statistics are only sent when the archive has them
+            for label, value, fmt in (
+                ("Sentiment Trend (EWMA)", sentiment_data.sentiment_ewma, "{:.2f}"),
+                ("Sentiment Change (1 Day)", sentiment_data.sentiment_change_1d, "{:+.2f}"),
+                ("Sentiment Change (7 Days)", sentiment_data.sentiment_change_7d, "{:+.2f}"),
+                ("News Velocity (articles/day)", sentiment_data.article_velocity, "{:.1f}"),
+            ):
+                if not math.isnan(value):
+                    lines.append(f"{label}: {fmt.format(value)}")
+            lines.append("Recent Headlines:")
             for headline in sentiment_data.recent_headlines:
-                prompt += f"- {headline}\n"
-        
-        prompt += "\nBased on both financial metrics and recent news sentiment, is this a good investment at the current price? Keep it short and concise. Be sure to add a risk level, target price range, and recommendation."
-        return prompt 
\ No newline at end of file
+                lines.append(f"- {headline}")
+        return lines
+
+    @staticmethod
+    def _parse_batch_response(text: str, tickers: Set[str]) -> Dict[str, str]:
+        """Turn the model's JSON array into formatted recommendations, skipping bad entries"""
+        start, end = text.find("["), text.rfind("]")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            entries = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return {}
+
+        recommendations = {}
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                ticker = str(entry["ticker"]).upper()
+                if ticker not in tickers:
+                    continue
+                target_low = float(entry["target_low"])
+                target_high = float(entry["target_high"])
+                recommendations[ticker] = (
+                    f"Risk Level: {entry['risk_level']}\n"
+                    f"Target Price Range: ${target_low:.2f} - ${target_high:.2f}\n"
+                    f"Recommendation: {entry['recommendation']}"
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        return recommendations
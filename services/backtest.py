@@ -0,0 +1,213 @@
+import math
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence, Tuple
+import numpy as np
+from models.stock_data import StockAnalysis
+from services.price_history_service import load_close_prices, yfinance_download
+from config import BACKTEST_HORIZONS, BACKTEST_PRICE_PERIOD
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ACTIONS = {"buy": 1, "hold": 0, "sell": -1}
+RISK_LEVELS = {"low": "Low", "medium": "Medium", "moderate": "Medium", "high": "High"}
+
+_ACTION_PATTERN = re.compile(r"\b(strong\s+buy|buy|hold|strong\s+sell|sell)\b", re.IGNORECASE)
+_TARGET_PATTERN = re.compile(
+    r"target[^\n$\d]*\$?\s*([\d,]+(?:\.\d+)?)\s*(?:-|–|—|to)\s*\$?\s*([\d,]+(?:\.\d+)?)", re.IGNORECASE)
+_RISK_PATTERN = re.compile(r"risk(?:\s+level)?\s*[:\-]?\s*\**\s*(low|medium|moderate|high)", re.IGNORECASE)
+
+@dataclass
+class Signal:
+    action: Optional[int]  # 1 buy, 0 hold, -1 sell
+    target_low: float
+    target_high: float
+    risk_level: Optional[str]
+
+def parse_recommendation(text: Optional[str]) -> Signal:
+    """Pull the action, target price range and risk level out of a free-text recommendation.
+
+    The action is the first Buy/Hold/Sell on the "Recommendation:" line,
+    so later qualifiers ("Buy, but don't sell before earnings") don't
+    override it; without one it is the last in the whole text, where the
+    conclusion usually comes. Parts that can't be found are None or NaN.
+    """
+    if not text:
+        return Signal(None, math.nan, math.nan, None)
+
+    action = None
+    recommendation_line = re.search(r"recommendation\s*:[^\n]*", text, re.IGNORECASE)
+    line_matches = _ACTION_PATTERN.findall(recommendation_line.group(0)) if recommendation_line else []
+    if line_matches:
+        action = ACTIONS[line_matches[0].split()[-1].lower()]
+    else:
+        matches = _ACTION_PATTERN.findall(text)
+        if matches:
+            action = ACTIONS[matches[-1].split()[-1].lower()]
+
+    target_low = target_high = math.nan
+    target = _TARGET_PATTERN.search(text)
+    if target:
+        low, high = (float(value.replace(",", "")) for value in target.groups())
+        target_low, target_high = min(low, high), max(low, high)
+
+    risk = _RISK_PATTERN.search(text)
+    return Signal(action, target_low, target_high, RISK_LEVELS[risk.group(1).lower()] if risk else None)
+
+def signals_frame(analyses: Sequence[StockAnalysis]) -> "pd.DataFrame":
+    """One row per analysis: ticker, date, action, target range and risk level"""
+    return _signals([(analysis.ticker, analysis.analysis_date, analysis.recommendation) for analysis in analyses])
+
+def _signals(rows: Sequence[Tuple[str, datetime, Optional[str]]]) -> "pd.DataFrame":
+    import pandas as pd
+
+    # Identical replies (cache hits, batched runs) are parsed once
+    parsed: Dict[Optional[str], Signal] = {}
+    tickers, dates, signals = [], [], []
+    for ticker, analysis_date, text in rows:
+        signal = parsed.get(text)
+        if signal is None:
+            signal = parsed[text] = parse_recommendation(text)
+        if signal.action is not None:
+            tickers.append(ticker)
+            dates.append(analysis_date)
+            signals.append(signal)
+
+    return pd.DataFrame({
+        "ticker": tickers,
+        "date": pd.to_datetime(dates).normalize() if dates else pd.DatetimeIndex([]),
+        "action": np.array([signal.action for signal in signals], dtype=np.int8),
+        "target_low": np.array([signal.target_low for signal in signals], dtype=np.float64),
+        "target_high": np.array([signal.target_high for signal in signals], dtype=np.float64),
+        "risk_level": [signal.risk_level or "Unknown" for signal in signals],
+    })
+
+def evaluate_signals(signals: "pd.DataFrame", close: "pd.DataFrame",
+                     horizons: Dict[str, int] = BACKTEST_HORIZONS) -> "pd.DataFrame":
+    """Attach forward returns and hit flags to every signal, for all tickers and dates at once.
+
+    A signal enters at the first close on or after its date. For each
+    horizon h it gets the return to the close h trading days later, a
+    direction hit (buy up, sell down, hold within the target range) and a
+    target hit (buy reaching target_low, sell reaching target_high, hold
+    ending inside the range at any point within the window).
+    """
+    result = signals.copy()
+    prices = close.to_numpy(dtype=np.float64)
+    n_days = len(prices)
+    columns = {ticker: position for position, ticker in enumerate(close.columns)}
+
+    col = result["ticker"].map(columns).to_numpy(dtype=float)
+    row = np.searchsorted(close.index.to_numpy(), result["date"].to_numpy(dtype="datetime64[ns]"), side="left")
+    known = ~np.isnan(col) & (row < n_days)
+    col = np.where(known, col, 0).astype(np.intp)
+    row = np.where(known, row, 0)
+
+    entry = np.where(known, prices[row, col], np.nan)
+    result["entry_price"] = entry
+    action = result["action"].to_numpy()
+    low = result["target_low"].to_numpy(dtype=float)
+    high = result["target_high"].to_numpy(dtype=float)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name, horizon in horizons.items():
+            exit_row = row + horizon
+            valid = known & (exit_row < n_days)
+            exit_row = np.where(valid, exit_row, 0)
+            exit_price = np.where(valid, prices[exit_row, col], np.nan)
+            forward = exit_price / entry - 1
+
+            # Best and worst close in (entry, entry + horizon], via forward-looking rolling windows
+            window_max = close[::-1].rolling(horizon, min_periods=1).max()[::-1].shift(-1).to_numpy()
+            window_min = close[::-1].rolling(horizon, min_periods=1).min()[::-1].shift(-1).to_numpy()
+            peak = np.where(valid, window_max[row, col], np.nan)
+            trough = np.where(valid, window_min[row, col], np.nan)
+
+            direction_hit = np.select(
+                [action == 1, action == -1],
+                [forward > 0, forward < 0],
+                default=(exit_price >= low) & (exit_price <= high),
+            )
+            target_hit = np.select(
+                [action == 1, action == -1],
+                [peak >= low, trough <= high],
+                default=(peak >= low) & (trough <= high),
+            )
+            has_target = ~np.isnan(low) & ~np.isnan(high)
+            # A hold is judged against its target range, so without one its direction can't be judged
+            judged = valid & ((action != 0) | has_target)
+
+            # Hits are 1.0 / 0.0, and NaN where they can't be judged, so means are hit rates
+            result[f"return_{name}"] = forward
+            result[f"direction_hit_{name}"] = np.where(judged, direction_hit, np.nan)
+            result[f"target_hit_{name}"] = np.where(valid & has_target, target_hit, np.nan)
+    return result
+
+def summarize(evaluated: "pd.DataFrame", by: str,
+              horizons: Dict[str, int] = BACKTEST_HORIZONS) -> "pd.DataFrame":
+    """Signal count, mean forward return and hit rates per group of `by` (e.g. action, risk_level)"""
+    aggregations = {"signals": ("ticker", "size")}
+    for name in horizons:
+        aggregations[f"mean_return_{name}"] = (f"return_{name}", "mean")
+        aggregations[f"direction_hit_rate_{name}"] = (f"direction_hit_{name}", "mean")
+        aggregations[f"target_hit_rate_{name}"] = (f"target_hit_{name}", "mean")
+    summary = evaluated.groupby(by).agg(**aggregations)
+    if by == "action":
+        summary.index = summary.index.map({value: name.title() for name, value in ACTIONS.items()})
+    return summary
+
+def _backtest_shard(args) -> "pd.DataFrame":
+    rows, close, horizons = args
+    return evaluate_signals(_signals(rows), close, horizons)
+
+class Backtester:
+    """Scores stored recommendations against what prices actually did afterwards"""
+    def __init__(self, horizons: Dict[str, int] = BACKTEST_HORIZONS,
+                 period: str = BACKTEST_PRICE_PERIOD,
+                 download: Callable[..., "pd.DataFrame"] = yfinance_download,
+                 workers: int = 1):
+        self.horizons = horizons
+        self.period = period
+        self.download = download
+        self.workers = workers
+
+    def run(self, analyses: Sequence[StockAnalysis], close: Optional["pd.DataFrame"] = None) -> "pd.DataFrame":
+        """Evaluate every analysis with a parseable action; prices are downloaded unless given"""
+        import pandas as pd
+
+        rows = [(analysis.ticker, analysis.analysis_date, analysis.recommendation) for analysis in analyses]
+        tickers = sorted({ticker for ticker, _, _ in rows})
+        if not tickers:
+            return _signals([])
+        if close is None:
+            close = load_close_prices(tickers, self.period, self.download)
+
+        processes = min(self.workers, len(tickers), os.cpu_count() or 1)
+        if processes <= 1:
+            return _backtest_shard((rows, close, self.horizons))
+
+        # Shard by ticker: each process parses its own recommendations and gets only its price columns
+        shards = [set(tickers[i::processes]) for i in range(processes)]
+        jobs = [([row for row in rows if row[0] in shard], close.reindex(columns=sorted(shard)), self.horizons)
+                for shard in shards]
+        # Never fork: the parent has live threads (report writer, executors) whose locks a fork would copy
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+            return pd.concat(list(executor.map(_backtest_shard, jobs)), ignore_index=True)
+
+    def report(self, evaluated: "pd.DataFrame") -> str:
+        if evaluated.empty:
+            return "No recommendations with a parseable action to backtest"
+        sections = []
+        for by, title in (("action", "By action"), ("risk_level", "By risk level")):
+            sections.append(f"{title}:\n{summarize(evaluated, by, self.horizons).round(3).to_string()}")
+        first, last = evaluated["date"].min(), evaluated["date"].max()
+        header = (f"Backtested {len(evaluated)} recommendations for {evaluated['ticker'].nunique()} tickers "
+                  f"from {first:%Y-%m-%d} to {last:%Y-%m-%d}")
+        return "\n\n".join([header] + sections)
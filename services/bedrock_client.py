@@ -0,0 +1,173 @@
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from utils.metrics import metrics
+from utils.rate_limit import TokenBucket
+from config import (
+    AWS_REGION,
+    BEDROCK_MODEL,
+    BEDROCK_INFERENCE_PARAMS,
+    BEDROCK_MAX_POOL_CONNECTIONS,
+    BEDROCK_REQUESTS_PER_MINUTE,
+    BEDROCK_TOKENS_PER_MINUTE,
+    BEDROCK_MAX_RETRIES,
+    BEDROCK_BACKOFF_BASE_SECONDS,
+    BEDROCK_BACKOFF_MAX_SECONDS,
+)
+
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+class BedrockClient:
+    """Rate-limited Bedrock runtime client shared by every AI request.
+
+    All calls go through one pooled boto3 client and a pair of token
+    buckets (requests and tokens per minute). Throttling errors are
+    retried with jittered exponential backoff instead of failing.
+    """
+    def __init__(self, client: Any = None,
+                 model_id: str = BEDROCK_MODEL,
+                 requests_per_minute: float = BEDROCK_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = BEDROCK_TOKENS_PER_MINUTE,
+                 max_retries: int = BEDROCK_MAX_RETRIES,
+                 backoff_base: float = BEDROCK_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = BEDROCK_BACKOFF_MAX_SECONDS):
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.model_id = model_id
+        self.request_limiter = TokenBucket(requests_per_minute / 60, requests_per_minute)
+        self.token_limiter = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @property
+    def client(self) -> Any:
+        """The boto3 runtime client, created on first use so startup never loads boto3"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import boto3
+                    from botocore.config import Config
+
+                    self._client = boto3.client(
+                        'bedrock-runtime',
+                        region_name=AWS_REGION,
+                        # Retries are handled here so they can share the rate limiter
+                        config=Config(max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+                                      retries={'mode': 'standard', 'max_attempts': 1}),
+                    )
+        return self._client
+
+    def invoke(self, prompt: str, params: Dict[str, Any] = BEDROCK_INFERENCE_PARAMS) -> Dict[str, Any]:
+        """Invoke the model and return the decoded response body"""
+        def call():
+            response = self.client.invoke_model(
+                modelId=self.model_id,
+                contentType="application/json",
+                accept="application/json",
+                body=self._request_body(prompt, params),
+            )
+            return json.loads(response['body'].read().decode('utf-8'))
+
+        estimate = self._estimate_tokens(prompt, params)
+        result = self._with_retries(call, estimate)
+        self._settle_tokens(estimate, result.get('usage'))
+        return result
+
+    def invoke_stream(self, prompt: str, on_text: Callable[[str], None],
+                      params: Dict[str, Any] = BEDROCK_INFERENCE_PARAMS) -> Dict[str, Any]:
+        """Stream the model's reply, calling `on_text` for each chunk.
+
+        Returns a body shaped like invoke's, with the full text and token usage.
+        """
+        def call():
+            response = self.client.invoke_model_with_response_stream(
+                modelId=self.model_id,
+                contentType="application/json",
+                accept="application/json",
+                body=self._request_body(prompt, params),
+            )
+            return response['body']
+
+        estimate = self._estimate_tokens(prompt, params)
+        # Only opening the stream is retried; once text has been emitted, errors propagate
+        stream = self._with_retries(call, estimate)
+
+        parts = []
+        usage = {}
+        for event in stream:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            payload = json.loads(chunk['bytes'].decode('utf-8'))
+            if payload.get('type') == 'content_block_delta':
+                text = payload.get('delta', {}).get('text', '')
+                if text:
+                    parts.append(text)
+                    on_text(text)
+            elif payload.get('type') == 'message_start':
+                usage.update(payload.get('message', {}).get('usage', {}))
+            elif payload.get('type') == 'message_delta':
+                usage.update(payload.get('usage', {}))
+
+        self._settle_tokens(estimate, usage)
+        return {'content': [{'type': 'text', 'text': "".join(parts)}], 'usage': usage}
+
+    async def ainvoke(self, prompt: str, params: Dict[str, Any] = BEDROCK_INFERENCE_PARAMS) -> Dict[str, Any]:
+        """Async variant of invoke; runs on a worker thread over the pooled client"""
+        import asyncio
+
+        return await asyncio.to_thread(self.invoke, prompt, params)
+
+    def _with_retries(self, call: Callable[[], Any], estimated_tokens: int) -> Any:
+        from botocore.exceptions import ClientError
+
+        attempt = 0
+        while True:
+            self.request_limiter.acquire()
+            self.token_limiter.acquire(estimated_tokens)
+            try:
+                return call()
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code', '')
+                if code not in RETRYABLE_ERROR_CODES or attempt >= self.max_retries:
+                    raise
+                metrics.increment("bedrock_retries_total")
+                # The throttled request consumed no quota
+                self.token_limiter.release(estimated_tokens)
+                time.sleep(self._backoff_delay(attempt))
+                attempt += 1
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from many workers over the whole window
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _settle_tokens(self, estimated: int, usage: Optional[Dict[str, Any]]) -> None:
+        metrics.increment("bedrock_requests_total")
+        if not usage:
+            return
+        metrics.increment("bedrock_input_tokens_total", usage.get('input_tokens', 0))
+        metrics.increment("bedrock_output_tokens_total", usage.get('output_tokens', 0))
+        actual = usage.get('input_tokens', 0) + usage.get('output_tokens', 0)
+        if actual < estimated:
+            self.token_limiter.release(estimated - actual)
+
+    @staticmethod
+    def _estimate_tokens(prompt: str, params: Dict[str, Any]) -> int:
+        # Roughly four characters per token, plus the full output budget
+        return len(prompt) // 4 + params.get('max_tokens', 0)
+
+    @staticmethod
+    def _request_body(prompt: str, params: Dict[str, Any]) -> str:
+        return json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            **params,
+            "messages": [{"role": "user", "content": prompt}]
+        })
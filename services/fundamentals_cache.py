@@ -0,0 +1,110 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+from peewee import CharField, CompositeKey, FloatField, TextField, fn
+from utils.cache_db import BaseCacheModel, init_cache_db
+from config import (
+    FUNDAMENTALS_FIELD_GROUPS,
+    FUNDAMENTALS_TTL_SECONDS,
+    FUNDAMENTALS_CACHE_MAX_TICKERS,
+    FUNDAMENTALS_STALE_WHILE_REVALIDATE,
+)
+
+class FundamentalsEntry(BaseCacheModel):
+    ticker = CharField()
+    group = CharField()
+    payload = TextField()
+    fetched_at = FloatField()
+    accessed_at = FloatField(index=True)
+
+    class Meta:
+        table_name = 'fundamentals'
+        primary_key = CompositeKey('ticker', 'group')
+
+@dataclass
+class CachedInfo:
+    info: Dict[str, Any]
+    stale_groups: List[str]
+    missing_groups: List[str]
+
+    @property
+    def is_fresh(self) -> bool:
+        return not self.stale_groups and not self.missing_groups
+
+class FundamentalsCache:
+    """SQLite-backed cache of the yfinance `info` fields FinancialData uses.
+
+    Each field group expires on its own TTL, and the least recently used
+    tickers are evicted once more than `max_tickers` are stored.
+    """
+    def __init__(self, field_groups: Dict[str, List[str]] = FUNDAMENTALS_FIELD_GROUPS,
+                 ttl_seconds: Dict[str, float] = FUNDAMENTALS_TTL_SECONDS,
+                 max_tickers: int = FUNDAMENTALS_CACHE_MAX_TICKERS,
+                 stale_while_revalidate: bool = FUNDAMENTALS_STALE_WHILE_REVALIDATE):
+        self.field_groups = field_groups
+        self.ttl_seconds = ttl_seconds
+        self.max_tickers = max_tickers
+        self.stale_while_revalidate = stale_while_revalidate
+        self.db = init_cache_db(FundamentalsEntry)
+
+    def get(self, ticker: str, refresh_groups: Iterable[str] = ()) -> Optional[CachedInfo]:
+        """Cached fields for `ticker`; groups in `refresh_groups` count as stale however recently fetched"""
+        ticker = ticker.upper()
+        refresh_groups = set(refresh_groups)
+        now = time.time()
+        rows = list(FundamentalsEntry.select().where(FundamentalsEntry.ticker == ticker))
+        if not rows:
+            return None
+
+        info = {}
+        stale_groups = []
+        cached_groups = set()
+        for row in rows:
+            if row.group not in self.field_groups:
+                continue
+            cached_groups.add(row.group)
+            info.update(json.loads(row.payload))
+            if row.group in refresh_groups or now - row.fetched_at >= self.ttl_seconds.get(row.group, 0):
+                stale_groups.append(row.group)
+
+        (FundamentalsEntry
+         .update(accessed_at=now)
+         .where(FundamentalsEntry.ticker == ticker)
+         .execute())
+
+        missing_groups = [group for group in self.field_groups if group not in cached_groups]
+        return CachedInfo(info=info, stale_groups=stale_groups, missing_groups=missing_groups)
+
+    def put(self, ticker: str, info: Dict[str, Any]) -> None:
+        ticker = ticker.upper()
+        now = time.time()
+        rows = [
+            {
+                'ticker': ticker,
+                'group': group,
+                'payload': json.dumps({field: info.get(field) for field in fields}),
+                'fetched_at': now,
+                'accessed_at': now,
+            }
+            for group, fields in self.field_groups.items()
+        ]
+        with self.db.atomic():
+            FundamentalsEntry.insert_many(rows).on_conflict_replace().execute()
+            self._evict()
+
+    def invalidate(self, ticker: str) -> None:
+        FundamentalsEntry.delete().where(FundamentalsEntry.ticker == ticker.upper()).execute()
+
+    def _evict(self) -> None:
+        ticker_count = FundamentalsEntry.select(fn.COUNT(FundamentalsEntry.ticker.distinct())).scalar()
+        overflow = ticker_count - self.max_tickers
+        if overflow <= 0:
+            return
+
+        least_recent = (FundamentalsEntry
+                        .select(FundamentalsEntry.ticker)
+                        .group_by(FundamentalsEntry.ticker)
+                        .order_by(fn.MAX(FundamentalsEntry.accessed_at))
+                        .limit(overflow))
+        FundamentalsEntry.delete().where(FundamentalsEntry.ticker.in_(least_recent)).execute()
@@ -0,0 +1,150 @@
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+from peewee import (EXCLUDED, AutoField, CharField, DateTimeField, FloatField, IntegerField, Model,
+                    SqliteDatabase, TextField, chunked)
+from models.stock_data import StockAnalysis
+from utils.cache_db import SQLITE_PRAGMAS
+from config import OUTPUT_DIR, HISTORY_DB_NAME
+
+# Deferred like the cache database; unlike the cache, nothing in it ever expires
+history_db = SqliteDatabase(None)
+_init_lock = threading.Lock()
+
+# Rows per INSERT, well under SQLite's bound-parameter limit
+_INSERT_BATCH_SIZE = 500
+
+class HistoryModel(Model):
+    class Meta:
+        database = history_db
+
+class AnalysisHistoryEntry(HistoryModel):
+    id = AutoField()
+    ticker = CharField()
+    analysis_date = DateTimeField()
+    current_price = FloatField(null=True)
+    sentiment_score = FloatField(null=True)
+    recommendation = TextField(null=True)
+    record = TextField()
+
+    class Meta:
+        table_name = 'analysis_history'
+        indexes = (
+            (('ticker', 'analysis_date'), False),
+            (('analysis_date',), False),
+        )
+
+class LatestAnalysisEntry(HistoryModel):
+    """Pointer to each ticker's newest history row, so latest-per-ticker is a key lookup"""
+    ticker = CharField(primary_key=True)
+    history_id = IntegerField()
+    analysis_date = DateTimeField()
+
+    class Meta:
+        table_name = 'analysis_latest'
+
+def init_history_db(path: Optional[Path] = None) -> SqliteDatabase:
+    with _init_lock:
+        if history_db.database is None:
+            path = Path(path or OUTPUT_DIR / HISTORY_DB_NAME)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            history_db.init(str(path), pragmas=SQLITE_PRAGMAS)
+            history_db.create_tables([AnalysisHistoryEntry, LatestAnalysisEntry], safe=True)
+    return history_db
+
+class AnalysisHistory:
+    """Append-only archive of every StockAnalysis, indexed by ticker and analysis date.
+
+    Rows are only ever inserted. Each batch is written in one transaction
+    and SQLite serializes writers, so concurrent analyses (threads or
+    processes) can append safely.
+    """
+    def __init__(self, path: Optional[Path] = None):
+        self.db = init_history_db(path)
+
+    def append(self, analyses: Sequence[StockAnalysis]) -> None:
+        for batch in chunked(analyses, _INSERT_BATCH_SIZE):
+            self._append_batch(batch)
+
+    def _append_batch(self, analyses: List[StockAnalysis]) -> None:
+        rows = []
+        for analysis in analyses:
+            record = analysis.to_record()
+            rows.append({
+                "ticker": analysis.ticker,
+                "analysis_date": analysis.analysis_date,
+                "current_price": record["current_price"],
+                "sentiment_score": record["sentiment_score"],
+                "recommendation": analysis.recommendation,
+                "record": json.dumps(record),
+            })
+
+        with self.db.atomic():
+            # Rowids of one multi-row insert are consecutive and end at the returned id,
+            # since the transaction holds the write lock and rows are never deleted
+            last_id = AnalysisHistoryEntry.insert_many(rows).execute()
+            newest = {}
+            for history_id, row in enumerate(rows, start=last_id - len(rows) + 1):
+                current = newest.get(row["ticker"])
+                if current is None or row["analysis_date"] >= current["analysis_date"]:
+                    newest[row["ticker"]] = {"ticker": row["ticker"], "history_id": history_id,
+                                             "analysis_date": row["analysis_date"]}
+
+            # Only move a pointer forward, so a late write of an older analysis can't win
+            LatestAnalysisEntry.insert_many(list(newest.values())).on_conflict(
+                conflict_target=[LatestAnalysisEntry.ticker],
+                preserve=[LatestAnalysisEntry.history_id, LatestAnalysisEntry.analysis_date],
+                where=(LatestAnalysisEntry.analysis_date <= EXCLUDED.analysis_date),
+            ).execute()
+
+    def history(self, ticker: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                limit: Optional[int] = None) -> List[StockAnalysis]:
+        """A ticker's analyses in [start, end), oldest first"""
+        query = (AnalysisHistoryEntry
+                 .select(AnalysisHistoryEntry.record)
+                 .where(self._date_range(AnalysisHistoryEntry.ticker == ticker.upper(), start, end))
+                 .order_by(AnalysisHistoryEntry.analysis_date))
+        if limit:
+            query = query.limit(limit)
+        return self._analyses(query)
+
+    def between(self, start: datetime, end: datetime,
+                tickers: Optional[Iterable[str]] = None) -> List[StockAnalysis]:
+        """Every analysis in [start, end), optionally only for `tickers`, oldest first"""
+        condition = self._date_range(None, start, end)
+        if tickers is not None:
+            condition &= AnalysisHistoryEntry.ticker.in_([ticker.upper() for ticker in tickers])
+        query = (AnalysisHistoryEntry
+                 .select(AnalysisHistoryEntry.record)
+                 .where(condition)
+                 .order_by(AnalysisHistoryEntry.analysis_date))
+        return self._analyses(query)
+
+    def latest(self, tickers: Optional[Iterable[str]] = None) -> Dict[str, StockAnalysis]:
+        """Each ticker's most recent analysis, for every ticker or just `tickers`"""
+        query = (AnalysisHistoryEntry
+                 .select(AnalysisHistoryEntry.record)
+                 .join(LatestAnalysisEntry, on=(AnalysisHistoryEntry.id == LatestAnalysisEntry.history_id)))
+        if tickers is not None:
+            query = query.where(LatestAnalysisEntry.ticker.in_([ticker.upper() for ticker in tickers]))
+        return {analysis.ticker: analysis for analysis in self._analyses(query)}
+
+    def count(self, ticker: Optional[str] = None) -> int:
+        query = AnalysisHistoryEntry.select()
+        if ticker:
+            query = query.where(AnalysisHistoryEntry.ticker == ticker.upper())
+        return query.count()
+
+    @staticmethod
+    def _date_range(condition, start: Optional[datetime], end: Optional[datetime]):
+        for clause in (AnalysisHistoryEntry.analysis_date >= start if start else None,
+                       AnalysisHistoryEntry.analysis_date < end if end else None):
+            if clause is not None:
+                condition = clause if condition is None else condition & clause
+        return condition
+
+    @staticmethod
+    def _analyses(query) -> List[StockAnalysis]:
+        return [StockAnalysis.from_record(json.loads(record)) for (record,) in query.tuples()]
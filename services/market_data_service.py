@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from utils.metrics import metrics
+from config import MARKET_DATA_TTL_SECONDS, MARKET_DATA_CACHE_SIZE
+
+def yfinance_ticker(ticker: str) -> Any:
+    """Default ticker factory over the shared session; imports yfinance (and pandas) on first use only"""
+    import yfinance as yf
+    from utils.http_session import yahoo_session
+
+    return yf.Ticker(ticker, session=yahoo_session())
+
+class MarketSnapshot:
+    """Market data for one ticker, backed by a single yfinance Ticker.
+
+    `info` and `news` share the Ticker's session and crumb, and each is
+    fetched at most once per snapshot no matter how many services read it.
+    They are locked separately, so the two requests can be in flight at once.
+    """
+    def __init__(self, ticker: str, stock: Any):
+        self.ticker = ticker
+        self.created_at = time.monotonic()
+        self._stock = stock
+        self._info_lock = threading.Lock()
+        self._news_lock = threading.Lock()
+        self._info: Optional[Dict[str, Any]] = None
+        self._news: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        with self._info_lock:
+            if self._info is None:
+                with metrics.span("fetch_info", self.ticker):
+                    self._info = self._stock.info or {}
+            return self._info
+
+    @property
+    def news(self) -> List[Dict[str, Any]]:
+        with self._news_lock:
+            if self._news is None:
+                with metrics.span("fetch_news", self.ticker):
+                    self._news = self._stock.news or []
+            return self._news
+
+    def prefetch(self) -> "MarketSnapshot":
+        """Fetch info and news back to back on the shared session"""
+        self.info
+        self.news
+        return self
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return time.monotonic() - self.created_at < ttl_seconds
+
+class MarketDataService:
+    """Hands out one MarketSnapshot per ticker, reused for `ttl_seconds`"""
+    def __init__(self, ttl_seconds: float = MARKET_DATA_TTL_SECONDS,
+                 max_entries: int = MARKET_DATA_CACHE_SIZE,
+                 ticker_factory: Callable[[str], Any] = yfinance_ticker):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.ticker_factory = ticker_factory
+        self._snapshots: Dict[str, MarketSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def get_snapshot(self, ticker: str) -> MarketSnapshot:
+        ticker = ticker.upper()
+        with self._lock:
+            snapshot = self._snapshots.get(ticker)
+            if snapshot and snapshot.is_fresh(self.ttl_seconds):
+                return snapshot
+
+            snapshot = MarketSnapshot(ticker, self.ticker_factory(ticker))
+            self._snapshots[ticker] = snapshot
+            if len(self._snapshots) > self.max_entries:
+                self._evict()
+            return snapshot
+
+    def invalidate(self, ticker: str) -> None:
+        with self._lock:
+            self._snapshots.pop(ticker.upper(), None)
+
+    def _evict(self) -> None:
+        for ticker in [t for t, s in self._snapshots.items() if not s.is_fresh(self.ttl_seconds)]:
+            del self._snapshots[ticker]
+
+        # Still over the cap: drop the oldest snapshots
+        overflow = len(self._snapshots) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(self._snapshots.items(), key=lambda item: item[1].created_at)
+            for ticker, _ in oldest[:overflow]:
+                del self._snapshots[ticker]
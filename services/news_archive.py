@@ -0,0 +1,193 @@
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from peewee import CharField, CompositeKey, FloatField, IntegerField, TextField, fn
+from services.sentiment_engine import SentimentEngine, article_id, article_published_at, article_text
+from utils.cache_db import BaseCacheModel, init_cache_db
+from config import NEWS_EWMA_HALF_LIFE_HOURS, NEWS_SNAPSHOT_DAYS
+
+DAY_SECONDS = 24 * 60 * 60
+
+class NewsArticle(BaseCacheModel):
+    ticker = CharField()
+    article_id = CharField()
+    headline = TextField()
+    sentiment_score = FloatField()
+    published_at = FloatField()
+    ingested_at = FloatField()
+
+    class Meta:
+        table_name = 'news_articles'
+        primary_key = CompositeKey('ticker', 'article_id')
+
+class NewsStats(BaseCacheModel):
+    """Running state per ticker; every statistic is derived from these few numbers"""
+    ticker = CharField(primary_key=True)
+    weighted_sum = FloatField()    # sum of score x decay over all articles
+    weight = FloatField()          # sum of decay over all articles
+    updated_at = FloatField()      # time both sums are decayed to
+    article_count = IntegerField()
+    snapshots = TextField()        # {day number: EWMA at the end of that day}, last NEWS_SNAPSHOT_DAYS days
+
+    class Meta:
+        table_name = 'news_stats'
+
+@dataclass
+class RollingSentiment:
+    ewma: float
+    velocity: float
+    change_1d: float
+    change_7d: float
+    article_count: int
+
+class NewsArchive:
+    """Stores each ticker's scored articles once and keeps rolling sentiment statistics.
+
+    Articles are deduplicated by Yahoo ID (or URL), so only articles not
+    seen before are scored. Each new article updates exponentially decayed
+    sums in O(1): their ratio is the EWMA sentiment, and the decayed count
+    gives the article velocity. A short ring of daily EWMA snapshots gives
+    the 1-day and 7-day change without rescanning history.
+    """
+    def __init__(self, engine: Optional[SentimentEngine] = None,
+                 half_life_hours: float = NEWS_EWMA_HALF_LIFE_HOURS,
+                 snapshot_days: int = NEWS_SNAPSHOT_DAYS):
+        self.engine = engine or SentimentEngine()
+        self.half_life = half_life_hours * 60 * 60
+        self.snapshot_days = snapshot_days
+        self.db = init_cache_db(NewsArticle, NewsStats)
+        self._lock = threading.Lock()
+
+    def ingest(self, articles_by_ticker: Dict[str, List[Dict[str, Any]]]
+               ) -> Dict[str, Dict[str, Tuple[str, float]]]:
+        """Archive and score any new articles; returns {article id: (headline, score)} per ticker"""
+        now = time.time()
+        with self._lock:
+            known = self._known_scores(articles_by_ticker)
+
+            new_articles = {}
+            for ticker, articles in articles_by_ticker.items():
+                fresh = []
+                for article in articles:
+                    identifier = article_id(article)
+                    if (ticker, identifier) not in known and identifier not in {i for i, _ in fresh}:
+                        fresh.append((identifier, article))
+                new_articles[ticker] = fresh
+
+            scored = self.engine.score_articles(
+                {ticker: [article for _, article in fresh] for ticker, fresh in new_articles.items()})
+            rows = []
+            for ticker, fresh in new_articles.items():
+                # score_articles keeps order but skips articles without a headline; skip the same ones here
+                with_headline = [(identifier, article) for identifier, article in fresh if article_text(article)[0]]
+                for (identifier, article), (headline, score) in zip(with_headline, scored[ticker]):
+                    known[(ticker, identifier)] = (headline, score)
+                    rows.append({
+                        "ticker": ticker,
+                        "article_id": identifier,
+                        "headline": headline,
+                        "sentiment_score": score,
+                        "published_at": article_published_at(article) or now,
+                        "ingested_at": now,
+                    })
+
+            if rows:
+                with self.db.atomic():
+                    NewsArticle.insert_many(rows).on_conflict_ignore().execute()
+                    for ticker in {row["ticker"] for row in rows}:
+                        self._update_stats(ticker, [row for row in rows if row["ticker"] == ticker], now)
+
+        scores = {ticker: {} for ticker in articles_by_ticker}
+        for (ticker, identifier), scored_article in known.items():
+            scores[ticker][identifier] = scored_article
+        return scores
+
+    def stats(self, ticker: str, as_of: Optional[float] = None) -> Optional[RollingSentiment]:
+        """Rolling statistics as of `as_of`, by default the start of the current UTC day.
+
+        A coarse clock keeps the statistics, and so the prompt and its
+        cached recommendation, unchanged within a day while still letting
+        velocity and the day-over-day changes decay once news stops. An
+        article published later that day moves the anchor up to itself.
+        """
+        entry = NewsStats.get_or_none(NewsStats.ticker == ticker)
+        if entry is None or entry.weight <= 0:
+            return None
+
+        if as_of is None:
+            newest = (NewsArticle.select(fn.MAX(NewsArticle.published_at))
+                      .where(NewsArticle.ticker == ticker).scalar())
+            as_of = max(time.time() // DAY_SECONDS * DAY_SECONDS, newest or 0.0)
+        ewma = entry.weighted_sum / entry.weight
+        # With decay constant tau, a steady rate r settles at weight r x tau
+        decayed_weight = entry.weight * self._decay(as_of - entry.updated_at)
+        velocity = decayed_weight / (self.half_life / math.log(2) / DAY_SECONDS)
+
+        snapshots = {int(day): value for day, value in json.loads(entry.snapshots).items()}
+        today = int(as_of // DAY_SECONDS)
+        return RollingSentiment(
+            ewma=round(ewma, 4),
+            velocity=round(velocity, 2),
+            change_1d=self._change(ewma, snapshots, today - 1),
+            change_7d=self._change(ewma, snapshots, today - 7),
+            article_count=entry.article_count,
+        )
+
+    def _known_scores(self, articles_by_ticker: Dict[str, List[Dict[str, Any]]]
+                      ) -> Dict[Tuple[str, str], Tuple[str, float]]:
+        known = {}
+        for ticker, articles in articles_by_ticker.items():
+            identifiers = [article_id(article) for article in articles]
+            if not identifiers:
+                continue
+            query = (NewsArticle
+                     .select(NewsArticle.article_id, NewsArticle.headline, NewsArticle.sentiment_score)
+                     .where((NewsArticle.ticker == ticker) & NewsArticle.article_id.in_(identifiers)))
+            for identifier, headline, score in query.tuples():
+                known[(ticker, identifier)] = (headline, score)
+        return known
+
+    def _update_stats(self, ticker: str, rows: List[Dict[str, Any]], now: float) -> None:
+        entry = NewsStats.get_or_none(NewsStats.ticker == ticker)
+        if entry is None:
+            weighted_sum, weight, count, snapshots = 0.0, 0.0, 0, {}
+        else:
+            decay = self._decay(now - entry.updated_at)
+            weighted_sum, weight = entry.weighted_sum * decay, entry.weight * decay
+            count = entry.article_count
+            snapshots = {int(day): value for day, value in json.loads(entry.snapshots).items()}
+
+        for row in rows:
+            # Older articles enter already decayed to now, so arrival order doesn't matter
+            age_decay = self._decay(max(0.0, now - row["published_at"]))
+            weighted_sum += row["sentiment_score"] * age_decay
+            weight += age_decay
+            count += 1
+
+        today = int(now // DAY_SECONDS)
+        if weight > 0:
+            snapshots[today] = weighted_sum / weight
+        snapshots = {day: value for day, value in snapshots.items() if day > today - self.snapshot_days}
+
+        NewsStats.replace(
+            ticker=ticker,
+            weighted_sum=weighted_sum,
+            weight=weight,
+            updated_at=now,
+            article_count=count,
+            snapshots=json.dumps(snapshots),
+        ).execute()
+
+    def _decay(self, elapsed: float) -> float:
+        return 0.5 ** (elapsed / self.half_life)
+
+    @staticmethod
+    def _change(ewma: float, snapshots: Dict[int, float], day: int) -> float:
+        # Latest snapshot taken on or before `day`; NaN when history doesn't reach back that far
+        earlier = [snapshot_day for snapshot_day in snapshots if snapshot_day <= day]
+        if not earlier:
+            return math.nan
+        return round(ewma - snapshots[max(earlier)], 4)
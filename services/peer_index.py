@@ -0,0 +1,169 @@
+import bisect
+import json
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from peewee import CharField, CompositeKey, FloatField, IntegerField, TextField
+from models.stock_data import FinancialData, PEER_PERCENTILE_FIELDS
+from utils.cache_db import BaseCacheModel, init_cache_db
+from config import PEER_SKETCH_ACCURACY, PEER_MIN_COUNT
+
+# Keeps positive keys above zero and negative keys below it for any |value| a ratio can take
+_KEY_OFFSET = 1_000_000
+
+def bucket_key(value: float, log_gamma: float) -> int:
+    """Log-spaced bucket key; keys sort in the same order as the values they hold"""
+    if value == 0:
+        return 0
+    index = math.ceil(math.log(abs(value)) / log_gamma) + _KEY_OFFSET
+    return index if value > 0 else -index
+
+class RatioSketch:
+    """Histogram of one ratio over log-spaced buckets `accuracy` wide.
+
+    Bucket counts can be added, removed and merged, so the sketch follows
+    a changing population without keeping the values; a percentile rank
+    costs a binary search over the occupied buckets, however many tickers
+    went into them.
+    """
+    __slots__ = ("log_gamma", "counts", "total", "_keys", "_cumulative")
+
+    def __init__(self, accuracy: float = PEER_SKETCH_ACCURACY, counts: Optional[Dict[int, int]] = None):
+        self.log_gamma = math.log1p(accuracy)
+        self.counts: Dict[int, int] = dict(counts or {})
+        self.total = sum(self.counts.values())
+        self._keys: Optional[List[int]] = None
+        self._cumulative: List[int] = []
+
+    def add(self, key: int, count: int = 1) -> None:
+        remaining = self.counts.get(key, 0) + count
+        if remaining > 0:
+            self.counts[key] = remaining
+        else:
+            self.counts.pop(key, None)
+        self.total += count
+        self._keys = None
+
+    def merge(self, other: "RatioSketch") -> None:
+        for key, count in other.counts.items():
+            self.add(key, count)
+
+    def rank(self, value: float) -> float:
+        """Fraction of values below `value`, counting its own bucket as half below"""
+        if self.total <= 0:
+            return math.nan
+        if self._keys is None:
+            self._keys = sorted(self.counts)
+            running = 0
+            self._cumulative = []
+            for key in self._keys:
+                running += self.counts[key]
+                self._cumulative.append(running)
+
+        key = bucket_key(value, self.log_gamma)
+        position = bisect.bisect_left(self._keys, key)
+        below = self._cumulative[position - 1] if position else 0
+        return (below + self.counts.get(key, 0) / 2) / self.total
+
+class PeerMember(BaseCacheModel):
+    """The ratios each ticker last contributed, so a refetch replaces rather than adds"""
+    ticker = CharField(primary_key=True)
+    industry = CharField()
+    ratios = TextField()
+    updated_at = FloatField()
+
+    class Meta:
+        table_name = 'peer_members'
+
+class PeerBucket(BaseCacheModel):
+    industry = CharField()
+    ratio = CharField()
+    key = IntegerField()
+    count = IntegerField()
+
+    class Meta:
+        table_name = 'peer_buckets'
+        primary_key = CompositeKey('industry', 'ratio', 'key')
+
+class PeerIndex:
+    """Per-industry ratio distributions, updated as each ticker's fundamentals are fetched.
+
+    Every fetch moves that ticker's bucket counts in memory and in the
+    cache database, so nothing is ever recomputed over the universe and a
+    warm start has peer context straight away.
+    """
+    def __init__(self, accuracy: float = PEER_SKETCH_ACCURACY, min_count: int = PEER_MIN_COUNT):
+        self.accuracy = accuracy
+        self.min_count = min_count
+        self.log_gamma = math.log1p(accuracy)
+        self.db = init_cache_db(PeerMember, PeerBucket)
+        self._lock = threading.Lock()
+        self._sketches: Dict[Tuple[str, str], RatioSketch] = {}
+        self._members: Dict[str, Tuple[str, Dict[str, int]]] = {}
+        self._industry_sizes: Dict[str, int] = {}
+
+        for industry, ratio, key, count in PeerBucket.select(
+                PeerBucket.industry, PeerBucket.ratio, PeerBucket.key, PeerBucket.count).tuples():
+            self._sketch(industry, ratio).add(key, count)
+        for member in PeerMember.select():
+            self._members[member.ticker] = (member.industry, json.loads(member.ratios))
+            self._industry_sizes[member.industry] = self._industry_sizes.get(member.industry, 0) + 1
+
+    def apply(self, ticker: str, financial_data: FinancialData) -> FinancialData:
+        """Record the ticker's ratios, then fill in its industry percentiles"""
+        industry = financial_data.industry
+        if not industry or industry == "N/A":
+            return financial_data
+
+        ratios = {ratio: getattr(financial_data, ratio) for ratio in PEER_PERCENTILE_FIELDS}
+        with self._lock:
+            self._observe(ticker.upper(), industry, ratios)
+            for ratio, value in ratios.items():
+                sketch = self._sketches.get((industry, ratio))
+                if sketch and sketch.total >= self.min_count and not math.isnan(value):
+                    setattr(financial_data, PEER_PERCENTILE_FIELDS[ratio], round(sketch.rank(value), 4))
+            financial_data.industry_peer_count = float(self._industry_sizes.get(industry, 0))
+        return financial_data
+
+    def _observe(self, ticker: str, industry: str, ratios: Dict[str, float]) -> None:
+        keys = {ratio: bucket_key(value, self.log_gamma)
+                for ratio, value in ratios.items() if not math.isnan(value)}
+        previous = self._members.get(ticker)
+        if previous == (industry, keys):
+            return
+
+        deltas: Dict[Tuple[str, str, int], int] = {}
+        if previous:
+            old_industry, old_keys = previous
+            for ratio, key in old_keys.items():
+                deltas[(old_industry, ratio, key)] = deltas.get((old_industry, ratio, key), 0) - 1
+        for ratio, key in keys.items():
+            deltas[(industry, ratio, key)] = deltas.get((industry, ratio, key), 0) + 1
+        deltas = {bucket: delta for bucket, delta in deltas.items() if delta}
+
+        for (bucket_industry, ratio, key), delta in deltas.items():
+            self._sketch(bucket_industry, ratio).add(key, delta)
+        if previous:
+            self._industry_sizes[previous[0]] -= 1
+        self._industry_sizes[industry] = self._industry_sizes.get(industry, 0) + 1
+        self._members[ticker] = (industry, keys)
+
+        with self.db.atomic():
+            for (bucket_industry, ratio, key), delta in deltas.items():
+                PeerBucket.insert(industry=bucket_industry, ratio=ratio, key=key, count=delta).on_conflict(
+                    conflict_target=[PeerBucket.industry, PeerBucket.ratio, PeerBucket.key],
+                    update={PeerBucket.count: PeerBucket.count + delta},
+                ).execute()
+                if delta < 0:
+                    PeerBucket.delete().where(
+                        (PeerBucket.industry == bucket_industry) & (PeerBucket.ratio == ratio)
+                        & (PeerBucket.key == key) & (PeerBucket.count <= 0)).execute()
+            PeerMember.replace(ticker=ticker, industry=industry, ratios=json.dumps(keys),
+                               updated_at=time.time()).execute()
+
+    def _sketch(self, industry: str, ratio: str) -> RatioSketch:
+        sketch = self._sketches.get((industry, ratio))
+        if sketch is None:
+            sketch = self._sketches[(industry, ratio)] = RatioSketch(self.accuracy)
+        return sketch
@@ -0,0 +1,154 @@
+import threading
+import time
+import warnings
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List
+import numpy as np
+from models.stock_data import FinancialData
+from utils.metrics import metrics
+from config import PRICE_HISTORY_PERIOD, PRICE_HISTORY_TTL_SECONDS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Indicator columns, named after the FinancialData fields they fill
+INDICATOR_FIELDS = [
+    "sma_50",
+    "sma_200",
+    "ema_20",
+    "rsi_14",
+    "volatility_30d",
+    "max_drawdown",
+    "week52_position",
+]
+
+def yfinance_download(*args, **kwargs) -> "pd.DataFrame":
+    """Default downloader over the shared session; imports yfinance (and pandas) on first use only"""
+    import yfinance as yf
+    from utils.http_session import yahoo_session
+
+    kwargs.setdefault("session", yahoo_session())
+    return yf.download(*args, **kwargs)
+
+def load_close_prices(tickers: List[str], period: str = PRICE_HISTORY_PERIOD,
+                      download: Callable[..., "pd.DataFrame"] = yfinance_download) -> "pd.DataFrame":
+    """Download adjusted closes for every ticker in one request; returns a date x ticker frame"""
+    import pandas as pd
+
+    data = download(tickers, period=period, auto_adjust=True, progress=False,
+                    threads=True, group_by='column')
+    if data is None or data.empty:
+        return pd.DataFrame(columns=tickers, dtype=float)
+
+    close = data['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+    # Carry prices over holidays and halts so windows line up across tickers
+    return close.reindex(columns=tickers).sort_index().ffill()
+
+def compute_indicators(close: "pd.DataFrame") -> "pd.DataFrame":
+    """Compute the latest technical indicators for every column of a date x ticker price frame.
+
+    Everything is evaluated on the whole (dates x tickers) matrix at once;
+    tickers without enough history get NaN for the affected indicators.
+    """
+    import pandas as pd
+
+    if close.empty:
+        return pd.DataFrame(index=close.columns, columns=INDICATOR_FIELDS, dtype=float)
+
+    with warnings.catch_warnings():
+        # All-NaN columns (unknown tickers) are expected and just produce NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        prices = close.to_numpy(dtype=np.float64)
+        last = prices[-1]
+        valid_days = np.sum(~np.isnan(prices), axis=0)
+
+        def trailing_mean(window: int) -> np.ndarray:
+            return np.where(valid_days >= window, np.nanmean(prices[-window:], axis=0), np.nan)
+
+        sma_50 = trailing_mean(50)
+        sma_200 = trailing_mean(200)
+        ema_20 = np.where(valid_days >= 20, close.ewm(span=20, adjust=False).mean().to_numpy()[-1], np.nan)
+
+        # Wilder's RSI: exponential averages of gains and losses with alpha = 1/14
+        deltas = close.diff()
+        avg_gain = deltas.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean().to_numpy()[-1]
+        avg_loss = (-deltas.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean().to_numpy()[-1]
+        rsi_14 = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+        rsi_14 = np.where(valid_days > 14, rsi_14, np.nan)
+
+        log_returns = np.diff(np.log(prices), axis=0)[-30:]
+        volatility_30d = np.nanstd(log_returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+        volatility_30d = np.where(valid_days > 30, volatility_30d, np.nan)
+
+        running_max = np.fmax.accumulate(prices, axis=0)
+        max_drawdown = np.nanmin(prices / running_max - 1, axis=0)
+
+        year = prices[-TRADING_DAYS_PER_YEAR:]
+        low, high = np.nanmin(year, axis=0), np.nanmax(year, axis=0)
+        week52_position = np.where(high > low, (last - low) / (high - low), np.nan)
+
+    return pd.DataFrame({
+        "sma_50": sma_50,
+        "sma_200": sma_200,
+        "ema_20": ema_20,
+        "rsi_14": rsi_14,
+        "volatility_30d": volatility_30d,
+        "max_drawdown": max_drawdown,
+        "week52_position": week52_position,
+    }, index=close.columns).round(4)
+
+class PriceHistoryService:
+    """Bulk price-history loader that keeps the latest indicators per ticker in memory"""
+    def __init__(self, period: str = PRICE_HISTORY_PERIOD,
+                 ttl_seconds: float = PRICE_HISTORY_TTL_SECONDS,
+                 download: Callable[..., "pd.DataFrame"] = yfinance_download):
+        self.period = period
+        self.ttl_seconds = ttl_seconds
+        self.download = download
+        self._indicators: Dict[str, Dict[str, float]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, tickers: Iterable[str]) -> None:
+        """Download and compute indicators for every ticker not already cached, in one request"""
+        now = time.monotonic()
+        with self._lock:
+            missing = [ticker.upper() for ticker in tickers
+                       if now - self._loaded_at.get(ticker.upper(), -np.inf) >= self.ttl_seconds]
+        if not missing:
+            return
+
+        try:
+            with metrics.span("price_history") as span:
+                span.attributes["tickers"] = len(missing)
+                indicators = compute_indicators(load_close_prices(missing, self.period, self.download))
+                records = indicators.to_dict(orient='index')
+        except Exception as e:
+            # Remember the failure too, so per-ticker lookups don't retry one by one
+            print(f"Error fetching price history: {e}")
+            records = {}
+
+        with self._lock:
+            for ticker in missing:
+                self._indicators[ticker] = records.get(ticker, {})
+                self._loaded_at[ticker] = now
+
+    def get_indicators(self, ticker: str) -> Dict[str, float]:
+        ticker = ticker.upper()
+        self.prefetch([ticker])
+        with self._lock:
+            return dict(self._indicators.get(ticker, {}))
+
+    def apply(self, ticker: str, financial_data: FinancialData) -> FinancialData:
+        """Copy the ticker's indicators onto `financial_data`, leaving NaN where unknown"""
+        return self.apply_indicators(self.get_indicators(ticker), financial_data)
+
+    @staticmethod
+    def apply_indicators(indicators: Dict[str, float], financial_data: FinancialData) -> FinancialData:
+        for field in INDICATOR_FIELDS:
+            setattr(financial_data, field, float(indicators.get(field, np.nan)))
+        return financial_data
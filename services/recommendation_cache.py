@@ -0,0 +1,96 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+from peewee import CharField, FloatField, TextField, fn
+from utils.cache_db import BaseCacheModel, init_cache_db
+from config import RECOMMENDATION_CACHE_TTL_SECONDS, RECOMMENDATION_CACHE_MAX_ENTRIES
+
+class RecommendationEntry(BaseCacheModel):
+    key = CharField(primary_key=True)
+    model_id = CharField()
+    recommendation = TextField()
+    created_at = FloatField()
+    accessed_at = FloatField(index=True)
+
+    class Meta:
+        table_name = 'recommendations'
+
+class RecommendationCache:
+    """On-disk cache of Bedrock recommendations keyed by a hash of the request.
+
+    Two requests share an entry when the model, inference parameters and
+    whitespace-normalized prompt are identical.
+    """
+    def __init__(self, ttl_seconds: float = RECOMMENDATION_CACHE_TTL_SECONDS,
+                 max_entries: int = RECOMMENDATION_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.db = init_cache_db(RecommendationEntry)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_id: str, params: Dict[str, Any], prompt: str) -> str:
+        payload = json.dumps({
+            'model': model_id,
+            'params': params,
+            'prompt': RecommendationCache.normalize_prompt(prompt),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        lines = (" ".join(line.split()) for line in prompt.splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = RecommendationEntry.get_or_none(
+            (RecommendationEntry.key == key) &
+            (RecommendationEntry.created_at > now - self.ttl_seconds)
+        )
+        with self._stats_lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        RecommendationEntry.update(accessed_at=now).where(RecommendationEntry.key == key).execute()
+        return entry.recommendation
+
+    def put(self, key: str, model_id: str, recommendation: str) -> None:
+        now = time.time()
+        with self.db.atomic():
+            RecommendationEntry.insert(
+                key=key,
+                model_id=model_id,
+                recommendation=recommendation,
+                created_at=now,
+                accessed_at=now,
+            ).on_conflict_replace().execute()
+            self._evict(now)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _evict(self, now: float) -> None:
+        RecommendationEntry.delete().where(
+            RecommendationEntry.created_at <= now - self.ttl_seconds
+        ).execute()
+
+        overflow = RecommendationEntry.select(fn.COUNT(RecommendationEntry.key)).scalar() - self.max_entries
+        if overflow > 0:
+            least_recent = (RecommendationEntry
+                            .select(RecommendationEntry.key)
+                            .order_by(RecommendationEntry.accessed_at)
+                            .limit(overflow))
+            RecommendationEntry.delete().where(RecommendationEntry.key.in_(least_recent)).execute()
@@ -0,0 +1,199 @@
+import hashlib
+import io
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+from services.bedrock_client import BedrockClient
+from services.market_data_service import MarketDataService, yfinance_ticker
+from services.price_history_service import PriceHistoryService, yfinance_download
+from utils.cassette import CassetteMiss, CassetteReader, CassetteWriter
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+def info_key(ticker: str) -> str:
+    return f"info:{ticker.upper()}"
+
+def news_key(ticker: str) -> str:
+    return f"news:{ticker.upper()}"
+
+def download_key(ticker: str, period: str) -> str:
+    # Per ticker, so a replay can batch price downloads differently from the recording
+    return f"download:{period}:{ticker.upper()}"
+
+def bedrock_key(operation: str, model_id: str, body: str) -> str:
+    digest = hashlib.sha256(f"{model_id}\n{body}".encode("utf-8")).hexdigest()
+    return f"{operation}:{digest}"
+
+def _ticker_columns(frame: Optional["pd.DataFrame"], ticker: str) -> Optional["pd.DataFrame"]:
+    """One ticker's (field, ticker) columns of a yfinance download"""
+    import pandas as pd
+
+    if frame is None:
+        return None
+    if not isinstance(frame.columns, pd.MultiIndex):
+        # Single-ticker downloads may come back without the ticker level
+        return pd.concat({ticker: frame}, axis=1).swaplevel(axis=1)
+    return frame.loc[:, frame.columns.get_level_values(-1) == ticker]
+
+def _frame_to_record(frame: Optional["pd.DataFrame"]) -> Optional[Dict[str, Any]]:
+    if frame is None:
+        return None
+    return {
+        "index": [timestamp.isoformat() for timestamp in frame.index],
+        "columns": [list(column) if isinstance(column, tuple) else [column] for column in frame.columns],
+        "values": frame.to_numpy(dtype=float).tolist(),
+    }
+
+def _frame_from_record(record: Optional[Dict[str, Any]]) -> Optional["pd.DataFrame"]:
+    import pandas as pd
+
+    if record is None:
+        return None
+    columns = [tuple(column) for column in record["columns"]]
+    if columns and len(columns[0]) == 1:
+        columns = pd.Index([column[0] for column in columns])
+    else:
+        columns = pd.MultiIndex.from_tuples(columns)
+    return pd.DataFrame(record["values"] or None, index=pd.to_datetime(record["index"]), columns=columns)
+
+class RecordingTicker:
+    """Passes `info` and `news` through to a real ticker, recording each response"""
+    def __init__(self, ticker: str, stock: Any, cassette: CassetteWriter):
+        self.ticker = ticker
+        self._stock = stock
+        self._cassette = cassette
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        info = self._stock.info
+        self._cassette.record(info_key(self.ticker), info)
+        return info
+
+    @property
+    def news(self) -> List[Dict[str, Any]]:
+        news = self._stock.news
+        self._cassette.record(news_key(self.ticker), news)
+        return news
+
+class ReplayTicker:
+    def __init__(self, ticker: str, cassette: CassetteReader):
+        self.ticker = ticker
+        self._cassette = cassette
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self._cassette.get(info_key(self.ticker))
+
+    @property
+    def news(self) -> List[Dict[str, Any]]:
+        return self._cassette.get(news_key(self.ticker))
+
+class RecordingBedrockRuntime:
+    """Wraps a bedrock-runtime client, recording every model response"""
+    def __init__(self, cassette: CassetteWriter, client_factory: Callable[[], Any]):
+        self._cassette = cassette
+        self._client_factory = client_factory
+        self._client = None
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        response = self.client.invoke_model(modelId=modelId, body=body, **kwargs)
+        payload = response['body'].read().decode('utf-8')
+        self._cassette.record(bedrock_key("invoke_model", modelId, body), payload)
+        return {**response, 'body': io.BytesIO(payload.encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        response = self.client.invoke_model_with_response_stream(modelId=modelId, body=body, **kwargs)
+        key = bedrock_key("invoke_stream", modelId, body)
+        return {**response, 'body': self._record_events(response['body'], key)}
+
+    def _record_events(self, events: Any, key: str) -> Iterator[Dict[str, Any]]:
+        chunks = []
+        for event in events:
+            chunk = event.get('chunk')
+            if chunk:
+                chunks.append(chunk['bytes'].decode('utf-8'))
+            yield event
+        # Only complete streams are recorded
+        self._cassette.record(key, chunks)
+
+class ReplayBedrockRuntime:
+    def __init__(self, cassette: CassetteReader):
+        self._cassette = cassette
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        payload = self._cassette.get(bedrock_key("invoke_model", modelId, body))
+        return {'body': io.BytesIO(payload.encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        chunks = self._cassette.get(bedrock_key("invoke_stream", modelId, body))
+        return {'body': iter([{'chunk': {'bytes': chunk.encode('utf-8')}} for chunk in chunks])}
+
+class Recorder:
+    """Records every Yahoo Finance and Bedrock response of a run into a cassette file"""
+    def __init__(self, path: Path, ticker_factory: Callable[[str], Any] = yfinance_ticker,
+                 download: Callable[..., "pd.DataFrame"] = yfinance_download,
+                 bedrock_client_factory: Optional[Callable[[], Any]] = None):
+        self.cassette = CassetteWriter(path)
+        self._ticker_factory = ticker_factory
+        self._download = download
+        self.runtime = RecordingBedrockRuntime(self.cassette,
+                                               bedrock_client_factory or (lambda: BedrockClient().client))
+
+    def ticker_factory(self, ticker: str) -> RecordingTicker:
+        return RecordingTicker(ticker, self._ticker_factory(ticker), self.cassette)
+
+    def download(self, tickers: List[str], period: str, **kwargs) -> "pd.DataFrame":
+        frame = self._download(tickers, period=period, **kwargs)
+        for ticker in tickers:
+            self.cassette.record(download_key(ticker, period), _frame_to_record(_ticker_columns(frame, ticker)))
+        return frame
+
+    def analyzer_services(self) -> Dict[str, Any]:
+        """Keyword arguments for StockAnalyzer that route its requests through the recorder"""
+        return {
+            "market_data": MarketDataService(ticker_factory=self.ticker_factory),
+            "price_history": PriceHistoryService(download=self.download),
+            "bedrock_client": BedrockClient(client=self.runtime),
+        }
+
+    def close(self) -> None:
+        self.cassette.close()
+
+class Replayer:
+    """Serves a recorded run from its cassette without touching the network"""
+    def __init__(self, path: Path):
+        self.cassette = CassetteReader(path)
+        self.runtime = ReplayBedrockRuntime(self.cassette)
+
+    def ticker_factory(self, ticker: str) -> ReplayTicker:
+        return ReplayTicker(ticker, self.cassette)
+
+    def download(self, tickers: List[str], period: str, **kwargs) -> "pd.DataFrame":
+        import pandas as pd
+
+        # Like yfinance, tickers without data are simply left out
+        frames = [_frame_from_record(self.cassette.get(download_key(ticker, period)))
+                  for ticker in tickers if download_key(ticker, period) in self.cassette]
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            raise CassetteMiss(download_key(",".join(tickers), period))
+        return pd.concat(frames, axis=1).sort_index()
+
+    def analyzer_services(self) -> Dict[str, Any]:
+        # No rate limits: nothing is sent anywhere, so replay runs at CPU speed
+        unlimited = 1e12
+        return {
+            "market_data": MarketDataService(ticker_factory=self.ticker_factory),
+            "price_history": PriceHistoryService(download=self.download),
+            "bedrock_client": BedrockClient(client=self.runtime, requests_per_minute=unlimited,
+                                            tokens_per_minute=unlimited),
+        }
+
+    def close(self) -> None:
+        self.cassette.close()
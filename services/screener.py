@@ -0,0 +1,100 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import ContextManager, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from models.stock_data import FinancialData, FinancialDataBatch
+from services.stock_service import StockService
+from config import SCREEN_FIELDS, MAX_WORKERS, STOCK_SERVICE_CONCURRENCY
+
+@dataclass
+class ScreenFilter:
+    field: str
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+_FILTER_PATTERN = re.compile(r"^\s*(\w+)\s*(<=|>=)\s*(-?[\d.]+(?:e-?\d+)?)\s*$")
+
+def parse_filter(expression: str) -> ScreenFilter:
+    """Parse filters such as "price_to_earnings<=30" or "roe>=0.15" """
+    match = _FILTER_PATTERN.match(expression)
+    if not match or match.group(1) not in SCREEN_FIELDS:
+        raise ValueError(f"Invalid screen filter '{expression}' "
+                         f"(expected <field><=value or <field>>=value, field one of {', '.join(SCREEN_FIELDS)})")
+    field, operator, value = match.group(1), match.group(2), float(match.group(3))
+    if operator == "<=":
+        return ScreenFilter(field, max_value=value)
+    return ScreenFilter(field, min_value=value)
+
+def parse_ranking(expression: str) -> Dict[str, float]:
+    """Parse rankings such as "roe:1,ev_to_ebitda:-1" into field weights"""
+    ranking = {}
+    for part in filter(None, (part.strip() for part in expression.split(","))):
+        field, _, weight = part.partition(":")
+        if field not in SCREEN_FIELDS:
+            raise ValueError(f"Invalid ranking field '{field}'")
+        ranking[field] = float(weight or 1)
+    return ranking
+
+class Screener:
+    """Cuts a universe of tickers down to the best candidates before any AI calls"""
+    def __init__(self, stock_service: StockService, max_workers: int = MAX_WORKERS,
+                 stock_limit: Optional[ContextManager] = None):
+        self.stock_service = stock_service
+        self.max_workers = max_workers
+        # Shared with the analyzer's other fetches, so a universe scan stays within the same cap
+        self.stock_limit = stock_limit or threading.BoundedSemaphore(STOCK_SERVICE_CONCURRENCY)
+
+    def load_universe(self, tickers: Iterable[str]) -> FinancialDataBatch:
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            records = list(executor.map(self._fetch, tickers))
+        return FinancialDataBatch.from_records(tickers, records)
+
+    def _fetch(self, ticker: str) -> Optional[FinancialData]:
+        with self.stock_limit:
+            return self.stock_service.fetch_stock_data(ticker)
+
+    @staticmethod
+    def screen(batch: FinancialDataBatch, filters: Sequence[ScreenFilter],
+               ranking: Dict[str, float], top_k: int) -> List[str]:
+        """Return up to `top_k` tickers that pass every filter, best ranked first.
+
+        Rows missing a filtered field never pass that filter. Each ranked
+        field contributes weight x percentile rank, with missing values
+        treated as the median.
+        """
+        mask = np.ones(len(batch), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for screen_filter in filters:
+                column = batch.column(screen_filter.field)
+                if screen_filter.min_value is not None:
+                    mask &= column >= screen_filter.min_value
+                if screen_filter.max_value is not None:
+                    mask &= column <= screen_filter.max_value
+
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0 or top_k <= 0:
+            return []
+
+        scores = np.zeros(candidates.size)
+        for field, weight in ranking.items():
+            scores += weight * Screener._percentile_ranks(batch.column(field)[candidates])
+
+        if top_k < candidates.size:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(candidates.size)
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return batch.tickers[candidates[best]].tolist()
+
+    @staticmethod
+    def _percentile_ranks(values: np.ndarray) -> np.ndarray:
+        ranks = np.full(values.size, 0.5)
+        valid = ~np.isnan(values)
+        count = valid.sum()
+        if count > 1:
+            order = values[valid].argsort().argsort()
+            ranks[valid] = order / (count - 1)
+        return ranks
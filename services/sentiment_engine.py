@@ -0,0 +1,137 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from config import (
+    SENTIMENT_CACHE_SIZE,
+    SENTIMENT_PROCESS_POOL_THRESHOLD,
+    SENTIMENT_MAX_PROCESSES,
+)
+
+def _score_texts(texts: List[str]) -> List[float]:
+    # Imported here so nltk only loads once there is text to score, in workers too
+    from textblob import TextBlob
+
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+def article_text(article: Dict[str, Any]) -> Tuple[str, str]:
+    """Return (headline, text to score) for a yfinance news article"""
+    # Newer yfinance releases nest the article fields under 'content'
+    content = article.get('content') or {}
+    headline = article.get('title') or content.get('title') or ''
+    description = (article.get('description') or content.get('description')
+                   or content.get('summary') or '')
+    return headline, f"{headline} {description}".strip()
+
+def article_id(article: Dict[str, Any]) -> str:
+    """Stable identifier for a yfinance news article: its id, else its URL, else a headline hash"""
+    content = article.get('content') or {}
+    url = (content.get('canonicalUrl') or {}).get('url') or article.get('link')
+    identifier = article.get('id') or content.get('id') or article.get('uuid') or url
+    if identifier:
+        return str(identifier)
+    headline, _ = article_text(article)
+    return hashlib.blake2b(headline.encode('utf-8'), digest_size=8).hexdigest()
+
+def article_published_at(article: Dict[str, Any]) -> Optional[float]:
+    """Publication time of a yfinance news article as a Unix timestamp, if it has one"""
+    if article.get('providerPublishTime'):
+        return float(article['providerPublishTime'])
+    published = (article.get('content') or {}).get('pubDate')
+    if published:
+        try:
+            return datetime.fromisoformat(published.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+class SentimentEngine:
+    """Scores text polarity in batches, memoizing results by text hash.
+
+    Identical texts are scored once per batch and served from a bounded
+    LRU cache afterwards. Batches with more than `process_threshold`
+    unscored texts are spread over a process pool.
+    """
+    def __init__(self, cache_size: int = SENTIMENT_CACHE_SIZE,
+                 process_threshold: int = SENTIMENT_PROCESS_POOL_THRESHOLD,
+                 max_processes: Optional[int] = SENTIMENT_MAX_PROCESSES):
+        self.cache_size = cache_size
+        self.process_threshold = process_threshold
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self._cache: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def score(self, texts: Sequence[str]) -> List[float]:
+        keys = [self._key(text) for text in texts]
+
+        scores = {}
+        pending = {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in scores or key in pending:
+                    continue
+                cached = self._cache.get(key)
+                if cached is None:
+                    pending[key] = text
+                else:
+                    self._cache.move_to_end(key)
+                    scores[key] = cached
+
+        fresh = dict(zip(pending, self._score_uncached(list(pending.values()))))
+        scores.update(fresh)
+
+        with self._lock:
+            self._cache.update(fresh)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return [scores[key] for key in keys]
+
+    def score_articles(self, articles_by_ticker: Dict[str, List[Dict[str, Any]]]
+                       ) -> Dict[str, List[Tuple[str, float]]]:
+        """Score many tickers' articles in one batch, returning (headline, score) pairs"""
+        headlines = []
+        texts = []
+        owners = []
+        for ticker, articles in articles_by_ticker.items():
+            for article in articles:
+                headline, text = article_text(article)
+                if headline:
+                    owners.append(ticker)
+                    headlines.append(headline)
+                    texts.append(text)
+
+        results = {ticker: [] for ticker in articles_by_ticker}
+        for ticker, headline, score in zip(owners, headlines, self.score(texts)):
+            results[ticker].append((headline, score))
+        return results
+
+    def close(self) -> None:
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _score_uncached(self, texts: List[str]) -> List[float]:
+        if len(texts) <= self.process_threshold or self.max_processes < 2:
+            return _score_texts(texts)
+
+        with self._lock:
+            if self._pool is None:
+                # Never fork: the parent has live threads (stage pools, report writer) whose locks a fork would copy
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(max_workers=self.max_processes,
+                                                 mp_context=multiprocessing.get_context(method))
+            pool = self._pool
+
+        chunk_size = -(-len(texts) // self.max_processes)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        return [score for chunk in pool.map(_score_texts, chunks) for score in chunk]
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
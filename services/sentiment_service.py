@@ -1,50 +1,112 @@
-import yfinance as yf
-from textblob import TextBlob
 from models.stock_data import SentimentData, NewsItem
-from typing import List, Optional
+from services.market_data_service import MarketDataService, MarketSnapshot
+from services.sentiment_engine import SentimentEngine, article_id
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from utils.metrics import metrics
+from config import MAX_NEWS_ITEMS, MAX_HEADLINES
+
+if TYPE_CHECKING:
+    from services.news_archive import NewsArchive
 
 class SentimentService:
-    @staticmethod
-    def fetch_news_sentiment(ticker: str) -> Optional[SentimentData]:
+    def __init__(self, market_data: Optional[MarketDataService] = None,
+                 engine: Optional[SentimentEngine] = None,
+                 max_news_items: int = MAX_NEWS_ITEMS,
+                 archive: Optional["NewsArchive"] = None):
+        self.market_data = market_data or MarketDataService()
+        self.engine = engine or SentimentEngine()
+        self.max_news_items = max_news_items
+        # With an archive every fetched article is stored once and only new ones are scored
+        self.archive = archive
+
+    def fetch_news_sentiment(self, ticker: str,
+                             snapshot: Optional[MarketSnapshot] = None) -> Optional[SentimentData]:
         try:
-            stock = yf.Ticker(ticker)
-            news = stock.news
+            snapshot = snapshot or self.market_data.get_snapshot(ticker)
+            news = snapshot.news
             
             if not news:
                 return None
 
-            sentiments = []
-            headlines = []
-            
-            for article in news[:5]:
-                headline = article.get('title', '')
-                description = article.get('description', '')
-                
-                if headline:
-                    headlines.append(headline)
-                    full_text = f"{headline} {description}".strip()
-                    analysis = TextBlob(full_text)
-                    sentiments.append(analysis.sentiment.polarity)
-
-            if not sentiments:
-                return None
-                
-            avg_sentiment = sum(sentiments) / len(sentiments)
-            
-            return SentimentData(
-                sentiment_score=round(avg_sentiment, 2),
-                recent_headlines=headlines,
-                sentiment_summary=SentimentService._get_sentiment_category(avg_sentiment)
-            )
+            articles = news[:self.max_news_items]
+            with metrics.span("sentiment_scoring", ticker):
+                scored = self._score({ticker: news}, {ticker: articles})
+            return self._with_rolling_stats(ticker, self._build_sentiment_data(scored[ticker], self.headline_ids(articles)))
             
         except Exception as e:
             print(f"Error in sentiment analysis: {e}")
             return None
 
+    def fetch_news_sentiment_batch(self, snapshots: Dict[str, MarketSnapshot]
+                                   ) -> Dict[str, Optional[SentimentData]]:
+        """Score news for many tickers at once so repeated headlines are scored once"""
+        news = {}
+        for ticker, snapshot in snapshots.items():
+            try:
+                news[ticker] = snapshot.news
+            except Exception as e:
+                print(f"Error fetching news for {ticker}: {e}")
+                news[ticker] = []
+        articles = {ticker: items[:self.max_news_items] for ticker, items in news.items()}
+
+        try:
+            with metrics.span("sentiment_scoring") as span:
+                span.attributes["tickers"] = len(articles)
+                scored = self._score(news, articles)
+        except Exception as e:
+            print(f"Error in sentiment analysis: {e}")
+            return {ticker: None for ticker in snapshots}
+        return {ticker: self._with_rolling_stats(
+                    ticker, self._build_sentiment_data(scored[ticker], self.headline_ids(articles[ticker])))
+                for ticker in snapshots}
+
+    def _score(self, news: Dict[str, List[Dict[str, Any]]],
+               articles: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Tuple[str, float]]]:
+        """(headline, score) pairs for `articles`; with an archive, all of `news` is ingested first"""
+        if self.archive is None:
+            return self.engine.score_articles(articles)
+
+        archived = self.archive.ingest(news)
+        return {ticker: [archived[ticker][identifier] for identifier in self.headline_ids(items)
+                         if identifier in archived[ticker]]
+                for ticker, items in articles.items()}
+
+    def _with_rolling_stats(self, ticker: str, sentiment: Optional[SentimentData]) -> Optional[SentimentData]:
+        if sentiment is None or self.archive is None:
+            return sentiment
+        stats = self.archive.stats(ticker)
+        if stats:
+            sentiment.sentiment_ewma = stats.ewma
+            sentiment.article_velocity = stats.velocity
+            sentiment.sentiment_change_1d = stats.change_1d
+            sentiment.sentiment_change_7d = stats.change_7d
+        return sentiment
+
+    @staticmethod
+    def headline_ids(articles: List[Dict[str, Any]]) -> List[str]:
+        return [article_id(article) for article in articles]
+
+    @staticmethod
+    def _build_sentiment_data(scored: List[Tuple[str, float]],
+                              headline_ids: List[str]) -> Optional[SentimentData]:
+        if not scored:
+            return None
+
+        # Every article counts toward the score, but only the first few are listed
+        headlines = [headline for headline, _ in scored[:MAX_HEADLINES]]
+        avg_sentiment = sum(score for _, score in scored) / len(scored)
+
+        return SentimentData(
+            sentiment_score=round(avg_sentiment, 2),
+            recent_headlines=headlines,
+            sentiment_summary=SentimentService._get_sentiment_category(avg_sentiment),
+            headline_ids=headline_ids,
+        )
+
     @staticmethod
     def _get_sentiment_category(score: float) -> str:
         if score > 0.2:
             return "Positive"
         elif score < -0.2:
             return "Negative"
-        return "Neutral" 
\ No newline at end of file
+        return "Neutral"
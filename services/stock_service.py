@@ -1,28 +1,111 @@
-import yfinance as yf
+import threading
+from typing import Any, Dict, Optional, Sequence
 from models.stock_data import FinancialData
-from utils.helpers import safe_division
+from services.fundamentals_cache import FundamentalsCache
+from services.market_data_service import MarketDataService, MarketSnapshot
+from services.peer_index import PeerIndex
+from utils.helpers import safe_division, to_float
+from utils.metrics import metrics
+
+# An info dict without any of these came from a failed fetch
+CORE_INFO_FIELDS = ("currentPrice", "marketCap", "industry")
 
 class StockService:
-    @staticmethod
-    def fetch_stock_data(ticker: str) -> FinancialData:
+    def __init__(self, market_data: Optional[MarketDataService] = None,
+                 cache: Optional[FundamentalsCache] = None,
+                 peer_index: Optional[PeerIndex] = None):
+        self.market_data = market_data or MarketDataService()
+        self.cache = cache
+        self.peer_index = peer_index
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+
+    def fetch_stock_data(self, ticker: str, snapshot: Optional[MarketSnapshot] = None,
+                         refresh_groups: Sequence[str] = ()) -> FinancialData:
+        """Build FinancialData; cached `refresh_groups` are refetched before returning, never served stale"""
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-
-            return FinancialData(
-                current_price=info.get("currentPrice", "N/A"),
-                market_cap=info.get("marketCap", "N/A"),
-                industry=info.get("industry", "N/A"),
-                price_to_earnings=info.get("trailingPE", "N/A"),
-                dividend_yield=info.get("dividendYield", "N/A"),
-                peg_ratio=info.get("trailingPegRatio", "N/A"),
-                price_to_sales=info.get("priceToSalesTrailing12Months", "N/A"),
-                price_to_book=info.get("priceToBook", "N/A"),
-                earnings_yield=info.get("trailingPE", "N/A"),
+            snapshot = snapshot or self.market_data.get_snapshot(ticker)
+            info = self._load_info(ticker, snapshot, refresh_groups)
+
+            financial_data = FinancialData(
+                current_price=to_float(info.get("currentPrice")),
+                market_cap=to_float(info.get("marketCap")),
+                industry=info.get("industry") or "N/A",
+                price_to_earnings=to_float(info.get("trailingPE")),
+                dividend_yield=to_float(info.get("dividendYield")),
+                peg_ratio=to_float(info.get("trailingPegRatio")),
+                price_to_sales=to_float(info.get("priceToSalesTrailing12Months")),
+                price_to_book=to_float(info.get("priceToBook")),
+                earnings_yield=to_float(info.get("trailingPE")),
                 ev_to_ebitda=safe_division(info.get("enterpriseValue"), info.get("ebitda")),
-                roe=info.get("returnOnEquity", "N/A"),
-                roa=info.get("returnOnAssets", "N/A")
+                roe=to_float(info.get("returnOnEquity")),
+                roa=to_float(info.get("returnOnAssets"))
             )
         except Exception as e:
             print(f"Error fetching data for {ticker}: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+        if self.peer_index:
+            try:
+                self.peer_index.apply(ticker, financial_data)
+            except Exception as e:
+                # Peer context is optional; the fundamentals are still good without it
+                print(f"Error updating industry peers for {ticker}: {e}")
+        return financial_data
+
+    def _load_info(self, ticker: str, snapshot: MarketSnapshot,
+                   refresh_groups: Sequence[str] = ()) -> Dict[str, Any]:
+        if self.cache is None:
+            return snapshot.info
+
+        with metrics.span("fundamentals_cache", ticker):
+            cached = self.cache.get(ticker, refresh_groups)
+        if cached and cached.is_fresh:
+            return cached.info
+
+        if (cached and not cached.missing_groups and self.cache.stale_while_revalidate
+                and not set(cached.stale_groups) & set(refresh_groups)):
+            self._revalidate_in_background(ticker, snapshot)
+            return cached.info
+
+        try:
+            info = snapshot.info
+        except Exception as e:
+            if not cached:
+                raise
+            info = {}
+            print(f"Error fetching data for {ticker}, using cached data: {e}")
+        if not self._has_core_fields(info):
+            # A failed quoteSummary still returns a dict (e.g. with just trailingPegRatio); caching
+            # it would store empty groups as fresh, so treat it as a failure
+            if cached:
+                # Stale or partial beats nothing while Yahoo is throttling or the circuit is open
+                metrics.increment("fundamentals_stale_fallback_total")
+                return cached.info
+            return info
+
+        self.cache.put(ticker, info)
+        return info
+
+    @staticmethod
+    def _has_core_fields(info: Dict[str, Any]) -> bool:
+        return any(info.get(field) is not None for field in CORE_INFO_FIELDS)
+
+    def _revalidate_in_background(self, ticker: str, snapshot: MarketSnapshot) -> None:
+        with self._revalidating_lock:
+            if ticker in self._revalidating:
+                return
+            self._revalidating.add(ticker)
+
+        def revalidate():
+            try:
+                info = snapshot.info
+                if self._has_core_fields(info):
+                    self.cache.put(ticker, info)
+            except Exception as e:
+                print(f"Error refreshing cached data for {ticker}: {e}")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(ticker)
+
+        threading.Thread(target=revalidate, name=f"revalidate-{ticker}", daemon=True).start()
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from peewee import CharField, FloatField, TextField
+from models.stock_data import FinancialData, StockAnalysis
+from utils.cache_db import BaseCacheModel, init_cache_db
+from config import WATCHLIST_FINGERPRINT_TOLERANCES
+
+def bucket(value: float, tolerance: float) -> Optional[Tuple[int, int]]:
+    """Map a value onto (sign, log-spaced bucket `tolerance` wide); None for NaN"""
+    if math.isnan(value):
+        return None
+    if value == 0:
+        return (0, 0)
+    return (1 if value > 0 else -1, math.floor(math.log(abs(value)) / math.log1p(tolerance)))
+
+def compute_fingerprint(financial_data: FinancialData, headline_ids: Iterable[str],
+                        tolerances: Dict[str, float] = WATCHLIST_FINGERPRINT_TOLERANCES) -> str:
+    """Hash of the inputs that matter for a recommendation.
+
+    Numeric fields are bucketed by relative tolerance, so small moves keep
+    the fingerprint while crossing a bucket boundary or any new headline
+    changes it.
+    """
+    payload = {
+        "industry": financial_data.industry,
+        "fields": {name: bucket(getattr(financial_data, name), tolerance)
+                   for name, tolerance in sorted(tolerances.items())},
+        "headlines": sorted(set(headline_ids)),
+    }
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
+class WatchlistEntry(BaseCacheModel):
+    ticker = CharField(primary_key=True)
+    fingerprint = CharField()
+    analysis = TextField()
+    analyzed_at = FloatField()
+
+    class Meta:
+        table_name = 'watchlist_state'
+
+@dataclass
+class WatchlistRecord:
+    fingerprint: str
+    analysis: StockAnalysis
+    analyzed_at: float
+
+class WatchlistState:
+    """Last fingerprint and analysis per watched ticker, kept in the cache database"""
+    def __init__(self):
+        self.db = init_cache_db(WatchlistEntry)
+
+    def get(self, ticker: str) -> Optional[WatchlistRecord]:
+        entry = WatchlistEntry.get_or_none(WatchlistEntry.ticker == ticker)
+        if entry is None:
+            return None
+        return WatchlistRecord(entry.fingerprint, StockAnalysis.from_record(json.loads(entry.analysis)),
+                               entry.analyzed_at)
+
+    def put(self, ticker: str, fingerprint: str, analysis: StockAnalysis) -> None:
+        WatchlistEntry.replace(
+            ticker=ticker,
+            fingerprint=fingerprint,
+            analysis=json.dumps(analysis.to_record()),
+            analyzed_at=time.time(),
+        ).execute()
+
+    def remove(self, ticker: str) -> None:
+        WatchlistEntry.delete().where(WatchlistEntry.ticker == ticker).execute()
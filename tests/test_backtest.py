@@ -0,0 +1,28 @@
+import math
+import numpy as np
+import pandas as pd
+from services.backtest import ACTIONS, evaluate_signals, parse_recommendation
+
+def test_first_action_on_recommendation_line_wins():
+    signal = parse_recommendation("Recommendation: Buy, but do not sell before earnings\nRisk Level: Low")
+    assert signal.action == ACTIONS["buy"]
+    assert signal.risk_level == "Low"
+
+def test_action_falls_back_to_last_in_text():
+    signal = parse_recommendation("Analysts were split between buy and hold.\nOverall we would sell.")
+    assert signal.action == ACTIONS["sell"]
+
+def test_hold_without_target_range_is_not_judged():
+    close = pd.DataFrame({"AAA": [10.0, 11.0, 12.0]}, index=pd.date_range("2024-01-01", periods=3))
+    signals = pd.DataFrame({
+        "ticker": ["AAA", "AAA"],
+        "date": pd.to_datetime(["2024-01-01", "2024-01-01"]),
+        "action": np.array([ACTIONS["hold"], ACTIONS["hold"]], dtype=np.int8),
+        "target_low": [math.nan, 9.0],
+        "target_high": [math.nan, 13.0],
+        "risk_level": ["Unknown", "Unknown"],
+    })
+    evaluated = evaluate_signals(signals, close, {"2d": 2})
+    assert math.isnan(evaluated["direction_hit_2d"][0])
+    assert evaluated["direction_hit_2d"][1] == 1.0
+    assert evaluated["return_2d"][0] == evaluated["return_2d"][1]
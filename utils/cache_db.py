@@ -0,0 +1,36 @@
+import threading
+from pathlib import Path
+from typing import Optional, Type
+from peewee import Model, SqliteDatabase
+from config import CACHE_DB_PATH
+
+# WAL lets readers run alongside the single writer; busy_timeout waits out other writers
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+}
+
+# Deferred so importing a cache module never touches the disk
+cache_db = SqliteDatabase(None)
+
+_init_lock = threading.Lock()
+_created_tables = set()
+
+class BaseCacheModel(Model):
+    class Meta:
+        database = cache_db
+
+def init_cache_db(*models: Type[Model], path: Optional[Path] = None) -> SqliteDatabase:
+    """Open the shared on-disk cache database and create any missing tables"""
+    with _init_lock:
+        if cache_db.database is None:
+            path = Path(path or CACHE_DB_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            cache_db.init(str(path), pragmas=SQLITE_PRAGMAS)
+
+        missing = [model for model in models if model not in _created_tables]
+        if missing:
+            cache_db.create_tables(missing, safe=True)
+            _created_tables.update(missing)
+    return cache_db
@@ -0,0 +1,86 @@
+import json
+import mmap
+import struct
+import threading
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+MAGIC = b"SECASS01"
+# Trailer: offset and length of the compressed index, then the magic again
+_TRAILER = struct.Struct("<QQ8s")
+
+class CassetteMiss(KeyError):
+    """Raised on replay for a request that was never recorded"""
+
+class CassetteWriter:
+    """Appends recorded responses to a cassette file.
+
+    Layout: magic, then one zlib-compressed JSON record per response, then
+    a compressed index of key -> [(offset, length), ...] and a fixed-size
+    trailer pointing at it. Responses recorded more than once under the
+    same key are kept in order.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(MAGIC)
+        self._index: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, key: str, value: Any) -> None:
+        data = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(data)
+            self._index[key].append((offset, len(data)))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            index = zlib.compress(json.dumps(self._index, separators=(",", ":")).encode("utf-8"))
+            offset = self._file.tell()
+            self._file.write(index)
+            self._file.write(_TRAILER.pack(offset, len(index), MAGIC))
+            self._file.close()
+
+class CassetteReader:
+    """Serves recorded responses from a memory-mapped cassette, decompressing only what is asked for.
+
+    A key recorded several times replays its responses in order, then
+    keeps returning the last one.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < len(MAGIC) + _TRAILER.size or self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a cassette file")
+        offset, length, magic = _TRAILER.unpack(self._map[-_TRAILER.size:])
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is incomplete; was the recording run interrupted?")
+        self._index = json.loads(zlib.decompress(self._map[offset:offset + length]))
+        self._served: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        entries = self._index.get(key)
+        if not entries:
+            raise CassetteMiss(key)
+        with self._lock:
+            position = min(self._served[key], len(entries) - 1)
+            self._served[key] += 1
+        offset, length = entries[position]
+        return json.loads(zlib.decompress(self._map[offset:offset + length]))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._index.values())
+
+    def close(self) -> None:
+        self._map.close()
@@ -1,10 +1,60 @@
-from typing import Any, Union
+import math
+import threading
+from pathlib import Path
+from typing import Any, Callable, List, Optional
 
-def safe_division(a: Any, b: Any) -> Union[float, str]:
-    """Safely perform division, returning 'N/A' if invalid"""
+def safe_division(a: Any, b: Any) -> float:
+    """Safely perform division, returning NaN if invalid"""
     try:
         if a is None or b is None or b == 0:
-            return "N/A"
-        return a / b
+            return math.nan
+        return float(a / b)
     except Exception:
-        return "N/A" 
\ No newline at end of file
+        return math.nan
+
+def to_float(value: Any) -> float:
+    """Convert a raw data value to float, returning NaN for missing or non-numeric values"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def format_value(value: Any) -> str:
+    """Render a value for people and prompts, showing NaN as 'N/A'"""
+    if isinstance(value, float) and math.isnan(value):
+        return "N/A"
+    return str(value)
+
+def read_tickers_file(path: Path) -> List[str]:
+    """Read tickers from a file, one or more per line; '#' starts a comment"""
+    tickers = []
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            for ticker in line.replace(",", " ").split():
+                ticker = ticker.upper()
+                if ticker not in seen:
+                    seen.add(ticker)
+                    tickers.append(ticker)
+    return tickers
+
+class lazy_property:
+    """Like functools.cached_property, but the getter runs at most once even under threads"""
+    def __init__(self, getter: Callable[[Any], Any]):
+        self.getter = getter
+        self.name = getter.__name__
+        self.__doc__ = getter.__doc__
+        self._lock = threading.RLock()
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        with self._lock:
+            # Assigning the attribute, or a previous call, puts the value in the instance dict
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.getter(instance)
+            return instance.__dict__[self.name]
@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from utils.metrics import metrics
+from utils.rate_limit import AdaptiveRateLimiter, CircuitBreaker
+from config import (
+    YAHOO_POOL_SIZE,
+    YAHOO_INITIAL_RATE,
+    YAHOO_MIN_RATE,
+    YAHOO_MAX_RATE,
+    YAHOO_RATE_INCREASE,
+    YAHOO_RATE_DECREASE_FACTOR,
+    YAHOO_BURST,
+    YAHOO_MAX_RETRIES,
+    YAHOO_BACKOFF_BASE_SECONDS,
+    YAHOO_BACKOFF_MAX_SECONDS,
+    YAHOO_CIRCUIT_FAILURE_THRESHOLD,
+    YAHOO_CIRCUIT_RESET_SECONDS,
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while the circuit is open"""
+
+class PooledSession(requests.Session):
+    """HTTP session shared by every yfinance call in the process.
+
+    Connections are pooled and kept alive across tickers. Every request
+    waits on an adaptive rate limiter that halves its rate on 429/5xx and
+    ramps back up on success; throttled requests are retried with jittered
+    backoff, and after repeated failures a circuit breaker refuses requests
+    so callers fall back to cached data instead of piling on.
+    """
+    def __init__(self, pool_size: int = YAHOO_POOL_SIZE,
+                 limiter: Optional[AdaptiveRateLimiter] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 max_retries: int = YAHOO_MAX_RETRIES,
+                 backoff_base: float = YAHOO_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = YAHOO_BACKOFF_MAX_SECONDS):
+        super().__init__()
+        # Blocking pool: extra threads wait for a connection instead of opening throwaway ones
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.pool_size = pool_size
+        self.limiter = limiter or AdaptiveRateLimiter(
+            YAHOO_INITIAL_RATE, YAHOO_MIN_RATE, YAHOO_MAX_RATE,
+            YAHOO_RATE_INCREASE, YAHOO_RATE_DECREASE_FACTOR, YAHOO_BURST)
+        self.breaker = breaker or CircuitBreaker(YAHOO_CIRCUIT_FAILURE_THRESHOLD, YAHOO_CIRCUIT_RESET_SECONDS)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        metrics.set_gauge("yahoo_pool_size", pool_size)
+
+    def request(self, method, url, *args, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                metrics.increment("yahoo_circuit_rejections_total")
+                raise CircuitOpenError(f"Yahoo Finance circuit is open, not requesting {url}")
+
+            self.limiter.acquire()
+            self._track_in_flight(1)
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.exceptions.RequestException:
+                self._record_failure()
+                raise
+            finally:
+                self._track_in_flight(-1)
+                metrics.increment("yahoo_requests_total")
+
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                self.limiter.on_success()
+                self.breaker.record_success()
+                metrics.set_gauge("yahoo_rate_limit", self.limiter.rate)
+                return response
+
+            metrics.increment("yahoo_throttled_total")
+            self.limiter.on_throttle()
+            self._record_failure()
+            if attempt >= self.max_retries or self.breaker.state != CircuitBreaker.CLOSED:
+                return response
+            metrics.increment("yahoo_retries_total")
+            response.close()
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+            attempt += 1
+
+    def _record_failure(self) -> None:
+        if self.breaker.record_failure():
+            metrics.increment("yahoo_circuit_opened_total")
+        metrics.set_gauge("yahoo_rate_limit", self.limiter.rate)
+
+    def _track_in_flight(self, delta: int) -> None:
+        with self._in_flight_lock:
+            self._in_flight += delta
+            in_flight = self._in_flight
+        metrics.set_gauge("yahoo_pool_in_use", in_flight)
+        metrics.set_gauge("yahoo_pool_utilization", min(1.0, in_flight / self.pool_size))
+
+_session: Optional[PooledSession] = None
+_session_lock = threading.Lock()
+
+def yahoo_session() -> PooledSession:
+    """The process-wide session, created on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+        return _session
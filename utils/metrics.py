@@ -0,0 +1,201 @@
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from config import METRICS_MAX_SPANS, METRICS_QUANTILE_SAMPLES
+
+# Upper bounds (seconds) of the Prometheus histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+@dataclass
+class Span:
+    stage: str
+    ticker: Optional[str]
+    started_at: float
+    duration: float = 0.0
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+class StageStats:
+    """Running aggregates for one stage: constant memory however many spans it records.
+
+    Count, sum, max and the Prometheus bucket counts are exact; quantiles
+    come from the most recent `samples` durations.
+    """
+    __slots__ = ("count", "errors", "total", "max", "buckets", "recent")
+
+    def __init__(self, samples: int = METRICS_QUANTILE_SAMPLES):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)  # cumulative: spans at or under each bound
+        self.recent: Deque[float] = deque(maxlen=samples)
+
+    def add(self, duration: float, error: bool) -> None:
+        self.count += 1
+        self.errors += error
+        self.total += duration
+        self.max = max(self.max, duration)
+        for position in range(bisect.bisect_left(LATENCY_BUCKETS, duration), len(LATENCY_BUCKETS)):
+            self.buckets[position] += 1
+        self.recent.append(duration)
+
+    def copy(self) -> "StageStats":
+        stats = StageStats(self.recent.maxlen)
+        stats.count, stats.errors, stats.total, stats.max = self.count, self.errors, self.total, self.max
+        stats.buckets = list(self.buckets)
+        stats.recent.extend(self.recent)
+        return stats
+
+class Metrics:
+    """Thread-safe recorder of per-stage, per-ticker latency spans, counters and gauges"""
+    def __init__(self, max_spans: int = METRICS_MAX_SPANS):
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._stages: Dict[str, StageStats] = defaultdict(StageStats)
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, ticker: Optional[str] = None) -> Iterator[Span]:
+        """Time the enclosed block as one span; set attributes on the yielded Span"""
+        span = Span(stage=stage, ticker=ticker, started_at=time.time())
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            self._record(span)
+
+    def increment(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Record the current value of something that goes up and down, e.g. connections in use"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._stages.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def spans(self, ticker: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            return [span for span in self._spans if ticker is None or span.ticker == ticker]
+
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        stages = self._snapshot_stages()
+
+        summary = {}
+        for stage, stats in stages.items():
+            recent = sorted(stats.recent)
+            summary[stage] = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "total": stats.total,
+                "mean": stats.total / stats.count,
+                "p50": self._percentile(recent, 50),
+                "p95": self._percentile(recent, 95),
+                "p99": self._percentile(recent, 99),
+                "max": stats.max,
+            }
+        return summary
+
+    def counters(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def gauges(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._gauges)
+
+    def summary_table(self) -> str:
+        summary = self.stage_summary()
+        if not summary:
+            return "No stages recorded"
+
+        header = f"{'stage':<22}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total s':>10}"
+        lines = [header, "-" * len(header)]
+        for stage, stats in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+            lines.append(
+                f"{stage:<22}{stats['count']:>7}{stats['errors']:>8}"
+                f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}"
+                f"{stats['p99'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}{stats['total']:>10.2f}"
+            )
+        for name, value in sorted({**self.counters(), **self.gauges()}.items()):
+            lines.append(f"{name}: {value:g}")
+        return "\n".join(lines)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"stages": self.stage_summary(), "counters": self.counters(), "gauges": self.gauges()}
+
+    def to_prometheus(self) -> str:
+        """Render stage latencies as Prometheus histograms and counters in text exposition format"""
+        stages = self._snapshot_stages()
+        counters = self.counters()
+        gauges = self.gauges()
+
+        lines = [
+            "# HELP stock_evaluator_stage_seconds Latency of each pipeline stage",
+            "# TYPE stock_evaluator_stage_seconds histogram",
+        ]
+        for stage, stats in sorted(stages.items()):
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                lines.append(f'stock_evaluator_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'stock_evaluator_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+            lines.append(f'stock_evaluator_stage_seconds_sum{{stage="{stage}"}} {stats.total}')
+            lines.append(f'stock_evaluator_stage_seconds_count{{stage="{stage}"}} {stats.count}')
+
+        lines.append("# HELP stock_evaluator_stage_errors_total Failed spans per pipeline stage")
+        lines.append("# TYPE stock_evaluator_stage_errors_total counter")
+        for stage, stats in sorted(stages.items()):
+            lines.append(f'stock_evaluator_stage_errors_total{{stage="{stage}"}} {stats.errors}')
+
+        for name, value in sorted(counters.items()):
+            metric = f"stock_evaluator_{name}"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, value in sorted(gauges.items()):
+            metric = f"stock_evaluator_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Path) -> None:
+        """Write metrics to `path`: Prometheus text for .prom/.txt, JSON otherwise"""
+        path = Path(path)
+        if path.suffix in (".prom", ".txt"):
+            path.write_text(self.to_prometheus())
+        else:
+            path.write_text(json.dumps(self.to_json(), indent=2))
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            self._stages[span.stage].add(span.duration, span.error is not None)
+
+    def _snapshot_stages(self) -> Dict[str, StageStats]:
+        with self._lock:
+            return {stage: stats.copy() for stage, stats in self._stages.items()}
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], percentile: float) -> float:
+        # Nearest-rank percentile over the retained samples
+        rank = max(1, -(-len(sorted_values) * percentile // 100))
+        return sorted_values[int(rank) - 1]
+
+# Process-wide recorder shared by every service
+metrics = Metrics()
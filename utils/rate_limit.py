@@ -0,0 +1,124 @@
+import threading
+import time
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate_per_second`"""
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until `amount` tokens are available and take them; returns seconds waited"""
+        # A request larger than the bucket could never be served otherwise
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate_per_second
+            time.sleep(delay)
+            waited += delay
+
+    def release(self, amount: float) -> None:
+        """Return unused tokens, e.g. when an estimate turned out too high"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def set_rate(self, rate_per_second: float) -> None:
+        with self._lock:
+            self._refill()
+            self.rate_per_second = rate_per_second
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate adapts to the server: additive increase, multiplicative decrease.
+
+    Each success raises the rate by about `increase` requests/second per
+    second of sustained success; each throttle cuts it by
+    `decrease_factor`, at most once per `cooldown_seconds` so a burst of
+    429s from requests already in flight counts as one signal.
+    """
+    def __init__(self, initial_rate: float, min_rate: float, max_rate: float,
+                 increase: float, decrease_factor: float, burst: float,
+                 cooldown_seconds: float = 1.0):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self._bucket = TokenBucket(initial_rate, burst)
+        self._decreased_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._bucket.rate_per_second
+
+    def acquire(self) -> float:
+        return self._bucket.acquire()
+
+    def on_success(self) -> None:
+        with self._lock:
+            rate = self.rate
+            self._bucket.set_rate(min(self.max_rate, rate + self.increase / rate))
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._decreased_at < self.cooldown_seconds:
+                return
+            self._decreased_at = now
+            self._bucket.set_rate(max(self.min_rate, self.rate * self.decrease_factor))
+
+class CircuitBreaker:
+    """Stops calling a backend after `failure_threshold` consecutive failures.
+
+    While open every call is refused; after `reset_seconds` one probe is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                return True
+            # Half-open lets only the single probe through
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True when this one opened the circuit"""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED
+                                                and self._failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                return True
+            return False
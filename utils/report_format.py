@@ -0,0 +1,45 @@
+import math
+from dataclasses import asdict
+from datetime import datetime
+from typing import Optional
+from models.stock_data import FinancialData, SentimentData, StockAnalysis
+from utils.helpers import format_value
+
+SEPARATOR = "=" * 50
+
+def format_header(ticker: str, analysis_date: Optional[datetime] = None) -> str:
+    day = (analysis_date or datetime.now()).strftime("%Y-%m-%d")
+    return f"\nAnalysis for {ticker} - {day}\n\n" + SEPARATOR
+
+def format_inputs(financial_data: FinancialData, sentiment_data: Optional[SentimentData]) -> str:
+    lines = ["\nFinancial Data:"]
+    for key, value in asdict(financial_data).items():
+        lines.append(f"{key}: {format_value(value)}")
+
+    if sentiment_data:
+        lines.append("\nNews Sentiment Analysis:")
+        lines.append(f"Overall Sentiment: {sentiment_data.sentiment_summary}")
+        lines.append(f"Sentiment Score: {format_value(sentiment_data.sentiment_score)}")
+        if not math.isnan(sentiment_data.sentiment_ewma):
+            lines.append(f"Sentiment EWMA: {format_value(sentiment_data.sentiment_ewma)}")
+            lines.append(f"Sentiment Change 1d / 7d: {format_value(sentiment_data.sentiment_change_1d)} / "
+                         f"{format_value(sentiment_data.sentiment_change_7d)}")
+            lines.append(f"Articles per Day: {format_value(sentiment_data.article_velocity)}")
+        lines.append("\nRecent Headlines:")
+        for headline in sentiment_data.recent_headlines:
+            lines.append(f"- {headline}")
+    return "\n".join(lines)
+
+def format_results(analysis: StockAnalysis) -> str:
+    lines = [format_inputs(analysis.financial_data, analysis.sentiment_data)]
+
+    if analysis.recommendation:
+        lines.append("\nAI Recommendation:")
+        lines.append(analysis.recommendation)
+
+    lines.append("\n" + SEPARATOR + "\n")
+    return "\n".join(lines)
+
+def format_analysis(analysis: StockAnalysis) -> str:
+    """The full human-readable report: header followed by the results"""
+    return format_header(analysis.ticker, analysis.analysis_date) + "\n" + format_results(analysis)
@@ -0,0 +1,186 @@
+import csv
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence
+from models.stock_data import StockAnalysis
+from utils.report_format import format_analysis
+from config import OUTPUT_DIR, HISTORY_DB_NAME, REPORT_BATCH_SIZE, REPORT_FLUSH_SECONDS
+
+class ReportSink:
+    """Persists analyses; `write_batch` is only ever called from the writer thread"""
+    def write_batch(self, analyses: List[StockAnalysis]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class TextReportSink(ReportSink):
+    """One human-readable report file per ticker per day"""
+    def __init__(self, output_dir: Path = OUTPUT_DIR):
+        self.output_dir = Path(output_dir)
+
+    def path_for(self, ticker: str, analysis_date: Optional[datetime] = None) -> Path:
+        day = (analysis_date or datetime.now()).strftime("%Y-%m-%d")
+        return self.output_dir / f"{day}_{ticker}_analysis.txt"
+
+    def write_batch(self, analyses: List[StockAnalysis]) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for analysis in analyses:
+            with open(self.path_for(analysis.ticker, analysis.analysis_date), 'w') as f:
+                f.write(format_analysis(analysis) + "\n")
+
+class JsonlReportSink(ReportSink):
+    """Appends one JSON record per analysis to a daily .jsonl file"""
+    def __init__(self, output_dir: Path = OUTPUT_DIR):
+        self.output_dir = Path(output_dir)
+
+    def write_batch(self, analyses: List[StockAnalysis]) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(analysis.to_record()) + "\n" for analysis in analyses)
+        with open(self.output_dir / f"{datetime.now():%Y-%m-%d}_analyses.jsonl", 'a') as f:
+            f.write(lines)
+
+class CsvReportSink(ReportSink):
+    """Appends one row per analysis to a daily CSV file; headlines are joined with ' | '"""
+    def __init__(self, output_dir: Path = OUTPUT_DIR):
+        self.output_dir = Path(output_dir)
+
+    def write_batch(self, analyses: List[StockAnalysis]) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{datetime.now():%Y-%m-%d}_analyses.csv"
+        records = [self._flatten(analysis.to_record()) for analysis in analyses]
+        write_header = not path.exists()
+        with open(path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]))
+            if write_header:
+                writer.writeheader()
+            writer.writerows(records)
+
+    @staticmethod
+    def _flatten(record: dict) -> dict:
+        record["recent_headlines"] = " | ".join(record["recent_headlines"])
+        record["headline_ids"] = " ".join(record["headline_ids"])
+        return record
+
+class ParquetReportSink(ReportSink):
+    """Writes each batch as a Parquet part file under a daily directory (requires pyarrow)"""
+    def __init__(self, output_dir: Path = OUTPUT_DIR):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("The parquet report format requires pyarrow (pip install pyarrow)") from None
+        self.output_dir = Path(output_dir)
+        self._part = 0
+
+    def write_batch(self, analyses: List[StockAnalysis]) -> None:
+        import pandas as pd
+
+        directory = self.output_dir / f"{datetime.now():%Y-%m-%d}_analyses.parquet"
+        directory.mkdir(parents=True, exist_ok=True)
+        frame = pd.DataFrame([analysis.to_record() for analysis in analyses])
+        stamp = datetime.now().strftime("%H%M%S%f")
+        frame.to_parquet(directory / f"part-{stamp}-{self._part:05d}.parquet", index=False)
+        self._part += 1
+
+class HistoryReportSink(ReportSink):
+    """Appends every analysis to the queryable history database in the output directory"""
+    def __init__(self, output_dir: Path = OUTPUT_DIR):
+        from services.history_store import AnalysisHistory
+
+        self.history = AnalysisHistory(Path(output_dir) / HISTORY_DB_NAME)
+
+    def write_batch(self, analyses: List[StockAnalysis]) -> None:
+        self.history.append(analyses)
+
+REPORT_SINKS = {
+    "text": TextReportSink,
+    "jsonl": JsonlReportSink,
+    "csv": CsvReportSink,
+    "parquet": ParquetReportSink,
+    "history": HistoryReportSink,
+}
+
+def create_report_sinks(formats: Sequence[str], output_dir: Path = OUTPUT_DIR) -> List[ReportSink]:
+    return [REPORT_SINKS[name](output_dir) for name in dict.fromkeys(formats)]
+
+class BackgroundReportWriter:
+    """Hands analyses to report sinks in batches from a single background thread.
+
+    `submit` never blocks on disk I/O, so any number of analysis threads
+    can report concurrently; only the writer thread touches the sinks.
+    """
+    _STOP = object()
+
+    def __init__(self, sinks: Sequence[ReportSink],
+                 batch_size: int = REPORT_BATCH_SIZE,
+                 flush_interval: float = REPORT_FLUSH_SECONDS):
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._flush_requested = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, analysis: StockAnalysis) -> None:
+        self._queue.put(analysis)
+
+    def flush(self) -> None:
+        """Block until everything submitted so far has been written"""
+        self._flush_requested.set()
+        try:
+            self._queue.join()
+        finally:
+            self._flush_requested.clear()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self) -> "BackgroundReportWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Linger briefly to gather a fuller batch, unless someone is waiting on a flush
+            deadline = time.monotonic() + self.flush_interval
+            while (len(batch) < self.batch_size and batch[-1] is not self._STOP
+                   and not self._flush_requested.is_set()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, 0.05)))
+                except queue.Empty:
+                    continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            analyses = [item for item in batch if item is not self._STOP]
+            stopping = len(analyses) != len(batch)
+            if analyses:
+                self._write(analyses)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, analyses: List[StockAnalysis]) -> None:
+        for sink in self.sinks:
+            try:
+                sink.write_batch(analyses)
+            except Exception as e:
+                print(f"Error writing {type(sink).__name__} report: {e}")
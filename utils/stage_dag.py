@@ -0,0 +1,173 @@
+import contextlib
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from utils.metrics import metrics
+
+# How often a run checks whether its queued stages have started, so their deadlines can be set
+_START_POLL_SECONDS = 0.05
+
+class StageTimeout(Exception):
+    pass
+
+@dataclass
+class Stage:
+    """One step of a pipeline; `run` receives the values of the stages it requires, by name"""
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    requires: Tuple[str, ...] = ()
+    timeout: Optional[float] = None  # seconds from the stage starting to run; None waits forever
+    fallback: Any = None             # value used when the stage fails or times out
+    critical: bool = False           # failing, timing out or returning None aborts the run
+    limit: Optional[ContextManager] = None  # e.g. a semaphore, held while running; waiting on it isn't timed
+
+@dataclass
+class DagResult:
+    values: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    aborted_by: Optional[str] = None  # the critical stage that stopped the run
+
+    @property
+    def ok(self) -> bool:
+        return self.aborted_by is None
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.values.get(name, default)
+
+class StageDAG:
+    """Runs dependent stages on an executor, each as soon as its inputs are ready.
+
+    Independent stages run concurrently, so a run takes about as long as
+    its critical path. A stage that fails or overruns its timeout gets its
+    fallback value and its dependents carry on with that, unless it is
+    critical, in which case every unfinished stage is cancelled. A stage's
+    clock starts once it has a thread and its `limit`, so time spent
+    queueing never counts against it. Stages already running can't be
+    interrupted; their results are discarded, and stages of a finished run
+    that haven't started yet are skipped rather than run.
+    """
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        for stage in stages:
+            unknown = [name for name in stage.requires if name not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} requires unknown stages: {', '.join(unknown)}")
+        self._check_acyclic()
+
+    def run(self, executor: Executor, targets: Optional[Iterable[str]] = None,
+            label: Optional[str] = None) -> DagResult:
+        """Run the stages needed for `targets` (default: all); `label` tags metrics, e.g. the ticker"""
+        needed = self._ancestors(targets) if targets is not None else set(self.stages)
+        waiting = {name: set(self.stages[name].requires) for name in needed}
+        running: Dict[Future, str] = {}
+        started: Dict[str, float] = {}  # written by the stage threads as each stage body begins
+        finished = threading.Event()
+        result = DagResult()
+
+        def schedule_ready() -> None:
+            for name in [name for name, requires in waiting.items() if not requires]:
+                del waiting[name]
+                stage = self.stages[name]
+                inputs = {required: result.values[required] for required in stage.requires}
+                running[executor.submit(self._run_stage, stage, inputs, label, started, finished)] = name
+
+        def finish(name: str, value: Any = None, error: Optional[BaseException] = None) -> bool:
+            """Record a stage's outcome; returns False when the run must stop"""
+            stage = self.stages[name]
+            if error is None and stage.critical and value is None:
+                error = ValueError(f"Stage {name} produced no result")
+            if error is not None:
+                result.errors[name] = error
+                if stage.critical:
+                    result.aborted_by = name
+                    return False
+                value = stage.fallback
+            result.values[name] = value
+            for requires in waiting.values():
+                requires.discard(name)
+            return True
+
+        schedule_ready()
+        try:
+            while running:
+                # Stages still waiting for a thread or their limit have no deadline yet; poll until they start
+                deadlines = []
+                for name in running.values():
+                    stage = self.stages[name]
+                    if stage.timeout is not None:
+                        deadlines.append(started[name] + stage.timeout if name in started
+                                         else time.monotonic() + _START_POLL_SECONDS)
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                keep_going = True
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        keep_going &= finish(name, value=future.result())
+                    except Exception as e:
+                        keep_going &= finish(name, error=e)
+
+                now = time.monotonic()
+                for future, name in list(running.items()):
+                    stage = self.stages[name]
+                    if stage.timeout is not None and name in started and now - started[name] >= stage.timeout:
+                        del running[future]
+                        metrics.increment("stage_timeouts_total")
+                        keep_going &= finish(name, error=StageTimeout(
+                            f"Stage {name} timed out after {stage.timeout}s"))
+
+                if not keep_going:
+                    for future in running:
+                        future.cancel()
+                    metrics.increment("stage_aborts_total")
+                    return result
+                schedule_ready()
+            return result
+        finally:
+            finished.set()
+
+    @staticmethod
+    def _run_stage(stage: Stage, inputs: Dict[str, Any], label: Optional[str],
+                   started: Dict[str, float], finished: threading.Event) -> Any:
+        if finished.is_set():
+            return stage.fallback
+        with stage.limit if stage.limit is not None else contextlib.nullcontext():
+            # The run may have ended while this stage waited for its limit; don't spend a slot on it
+            if finished.is_set():
+                return stage.fallback
+            started[stage.name] = time.monotonic()
+            with metrics.span(f"stage_{stage.name}", label):
+                return stage.run(inputs)
+
+    def _ancestors(self, targets: Iterable[str]) -> Set[str]:
+        needed: Set[str] = set()
+        pending: List[str] = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].requires)
+        return needed
+
+    def _check_acyclic(self) -> None:
+        done: Set[str] = set()
+        visiting: Set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage dependencies form a cycle through {name}")
+            visiting.add(name)
+            for required in self.stages[name].requires:
+                visit(required)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
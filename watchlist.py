@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+from models.stock_data import FinancialData, SentimentData, StockAnalysis
+from services.market_data_service import MarketSnapshot
+from services.watchlist_state import WatchlistState, compute_fingerprint
+from utils.metrics import metrics
+from config import WATCHLIST_INTERVAL_SECONDS, WATCHLIST_MAX_AGE_SECONDS
+
+if TYPE_CHECKING:
+    # Not imported at runtime: under `python main.py --watch` that would load main.py a second time
+    from main import StockAnalyzer
+
+@dataclass
+class WatchlistResult:
+    ticker: str
+    analysis: Optional[StockAnalysis]
+    changed: bool
+
+@dataclass
+class _Check:
+    """One ticker's inputs from the fingerprinting pass"""
+    ticker: str
+    snapshot: Optional[MarketSnapshot] = None
+    financial_data: Optional[FinancialData] = None
+    fingerprint: Optional[str] = None
+    result: Optional[WatchlistResult] = None  # set when there is nothing to re-analyze
+
+class WatchlistScheduler:
+    """Re-analyzes a watchlist on a schedule, paying for sentiment and Bedrock only on change.
+
+    Each cycle fetches fundamentals and the news list (cheap, and cached
+    upstream), fingerprints them, and reuses the previous StockAnalysis when
+    the fingerprint matches and the analysis is younger than `max_age`.
+    The news of every changed ticker is then scored as one batch.
+    """
+    def __init__(self, analyzer: "StockAnalyzer", state: Optional[WatchlistState] = None,
+                 max_age_seconds: float = WATCHLIST_MAX_AGE_SECONDS):
+        self.analyzer = analyzer
+        self.state = state or WatchlistState()
+        self.max_age_seconds = max_age_seconds
+
+    def run_once(self, tickers: Sequence[str]) -> List[WatchlistResult]:
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        if self.analyzer.price_history:
+            self.analyzer.price_history.prefetch(tickers)
+        with ThreadPoolExecutor(max_workers=self.analyzer.max_workers) as executor:
+            checks = list(executor.map(self._check, tickers))
+
+            # Sentiment for every changed ticker is scored in one batch, so shared headlines are scored once
+            changed = [check for check in checks if check.result is None]
+            sentiment = self._score_sentiment(changed)
+            reanalyzed = dict(zip((check.ticker for check in changed), executor.map(
+                lambda check: self._reanalyze(check, sentiment.get(check.ticker)), changed)))
+        return [check.result or reanalyzed[check.ticker] for check in checks]
+
+    def run_forever(self, tickers: Sequence[str], interval_seconds: float = WATCHLIST_INTERVAL_SECONDS) -> None:
+        while True:
+            started = time.monotonic()
+            results = self.run_once(tickers)
+            self.analyzer.report_writer.flush()
+
+            changed = sum(result.changed for result in results)
+            failed = sum(result.analysis is None for result in results)
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {changed} re-analyzed, "
+                  f"{len(results) - changed - failed} unchanged, {failed} failed")
+            time.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
+
+    def _check(self, ticker: str) -> _Check:
+        """Fingerprint a ticker's inputs; the check carries a result already when nothing needs re-analysis"""
+        analyzer = self.analyzer
+        try:
+            snapshot = analyzer.market_data.get_snapshot(ticker)
+            # A quote served stale and revalidated in the background would surface price moves a cycle late
+            with analyzer._stock_limit:
+                financial_data = analyzer.stock_service.fetch_stock_data(
+                    ticker, snapshot, refresh_groups=("quote",))
+            if not financial_data:
+                return _Check(ticker, result=WatchlistResult(ticker, None, False))
+            if analyzer.price_history:
+                analyzer.price_history.apply(ticker, financial_data)
+
+            articles = snapshot.news[:analyzer.sentiment_service.max_news_items]
+            fingerprint = compute_fingerprint(financial_data, analyzer.sentiment_service.headline_ids(articles))
+            previous = self.state.get(ticker)
+            if (previous and previous.fingerprint == fingerprint
+                    and time.time() - previous.analyzed_at < self.max_age_seconds):
+                metrics.increment("watchlist_reused_total")
+                return _Check(ticker, result=WatchlistResult(ticker, previous.analysis, False))
+            return _Check(ticker, snapshot, financial_data, fingerprint)
+        except Exception as e:
+            print(f"Error refreshing {ticker}: {e}")
+            return _Check(ticker, result=WatchlistResult(ticker, None, False))
+
+    def _score_sentiment(self, checks: List[_Check]) -> Dict[str, Optional[SentimentData]]:
+        if not checks:
+            return {}
+        with self.analyzer._sentiment_limit:
+            return self.analyzer.sentiment_service.fetch_news_sentiment_batch(
+                {check.ticker: check.snapshot for check in checks})
+
+    def _reanalyze(self, check: _Check, sentiment_data: Optional[SentimentData]) -> WatchlistResult:
+        analyzer = self.analyzer
+        ticker = check.ticker
+        try:
+            recommendation = analyzer._recommend(ticker, check.financial_data, sentiment_data)
+            analysis = StockAnalysis(
+                ticker=ticker,
+                financial_data=check.financial_data,
+                sentiment_data=sentiment_data,
+                recommendation=recommendation,
+                analysis_date=datetime.now()
+            )
+            # Keep retrying on the next cycle when the recommendation failed
+            if recommendation:
+                self.state.put(ticker, check.fingerprint, analysis)
+            analyzer.report_writer.submit(analysis)
+            metrics.increment("watchlist_reanalyzed_total")
+            return WatchlistResult(ticker, analysis, True)
+        except Exception as e:
+            print(f"Error refreshing {ticker}: {e}")
+            return WatchlistResult(ticker, None, False)